@@ -4,12 +4,14 @@ A governed, JSON-native Bria FIBO image generation demo for the Bria Hackathon.
 Updated: Modern Enterprise Design
 """
 
+import os
 import streamlit as st
 import json
 import logging
 from datetime import datetime
 from vlm_agent import VLMAgent
 from policy_engine import PolicyEngine
+from policy_registry import PolicyLoadError, PolicyRegistry
 from fibo_client import FIBOClient
 from audit_log import AuditLog
 
@@ -647,15 +649,94 @@ header {visibility: hidden;}
 @st.cache_resource
 def initialize_components():
     """Initialize all application components."""
+    # Created first: loading its settings also loads .env
+    fibo_client = FIBOClient()
+    reload_interval = float(os.getenv("BRAND_PROFILE_RELOAD_SECONDS", "5"))
+    profiles_dir = os.getenv("BRAND_PROFILES_DIR")
+    policy_registry = PolicyRegistry(
+        profiles_dir,
+        memory_budget_bytes=int(float(os.getenv("BRAND_REGISTRY_MEMORY_MB", "64")) * 1024 * 1024),
+        reload_interval=reload_interval or None
+    ) if profiles_dir else None
     return {
         "vlm_agent": VLMAgent(),
-        "policy_engine": PolicyEngine("brand_profile.json"),
-        "fibo_client": FIBOClient(),
+        "policy_engine": PolicyEngine("brand_profile.json", reload_interval=reload_interval or None),
+        "policy_registry": policy_registry,
+        "fibo_client": fibo_client,
         "audit_log": AuditLog("audit_log.json")
     }
 
 components = initialize_components()
 
+
+def select_policy_engine():
+    """Return the policy engine for this session: the brand picked in the sidebar, or brand_profile.json."""
+    registry = components["policy_registry"]
+    brand_ids = registry.brand_ids() if registry is not None else []
+    if not brand_ids:
+        return components["policy_engine"]
+    brand_id = st.sidebar.selectbox("Brand", brand_ids, key="brand_id")
+    try:
+        return registry.get(brand_id)
+    except (KeyError, PolicyLoadError) as e:
+        logger.error(f"❌ {e}")
+        st.error(f"Brand policy for '{brand_id}' could not be loaded - using the default brand profile. {e}")
+        return components["policy_engine"]
+
+policy_engine = select_policy_engine()
+
+
+def render_variant_result(result, idx, compact=True):
+    """Render one generated variant: image, status pill and technical details."""
+    logger.info(f"🎨 Processing image {idx}: Status={result.get('status')}, Has Image={bool(result.get('image'))}")
+    if "image" in result and result["image"]:
+        logger.info(f"✅ Displaying image {idx}")
+        # Streamlit accepts the encoded bytes directly; no decode on our side
+        st.image(result["image"].data, use_column_width=True)
+        
+        # Enhanced caption with metadata
+        generation_timestamp = datetime.now().strftime("%H:%M:%S")
+        st.caption(f"🎯 **Variant {idx}** | 🕐 {generation_timestamp}")
+        
+        # Status indicator
+        if result.get("status") == "success":
+            st.markdown('<span class="status-pill status-success">✅ Compliant</span>', unsafe_allow_html=True)
+        elif result.get("status") == "safe_mode":
+            st.markdown('<span class="status-pill status-warning">⚡ Safe Mode Preview</span>', unsafe_allow_html=True)
+        else:
+            st.markdown('<span class="status-pill status-warning">Placeholder Mode</span>', unsafe_allow_html=True)
+    elif result.get("status") == "deadline_exceeded":
+        logger.warning(f"⏰ Image {idx} timed out")
+        st.warning(f"⏰ Variant {idx} timed out - try again or request fewer variants")
+    else:
+        logger.error(f"❌ Image {idx} missing or invalid: {result}")
+        st.error(f"Image {idx} failed to load")
+    
+    # Technical details in expander
+    with st.expander(f"View Details"):
+        metadata = result.get("metadata", {})
+        if compact:
+            col_a = col_b = st.container()
+        else:
+            col_a, col_b = st.columns(2)
+        with col_a:
+            st.write(f"**Model:** {metadata.get('model', 'Unknown')}")
+            st.write(f"**Provider:** {metadata.get('provider', 'Unknown')}")
+            st.write(f"**Generation Time:** {result.get('generation_time', 0):.1f}s")
+            timings = metadata.get("timings")
+            if timings:
+                st.write(f"**Queue / Connect / Remote / Decode:** {timings['queue_wait']:.1f}s / {timings.get('connect', 0):.2f}s / {timings['remote_call']:.1f}s / {timings['decode']:.2f}s")
+        with col_b:
+            st.write(f"**Size:** {metadata.get('size', 'Unknown')}")
+            st.write(f"**Seed:** {metadata.get('seed', 'Unknown')}")
+        
+        if result.get("prompt_string"):
+            st.write("**Final Prompt:**")
+            prompt_display = result.get("prompt_string", "")
+            if len(prompt_display) > 200:
+                prompt_display = prompt_display[:200] + "..."
+            st.code(prompt_display)
+
 # Compact Header Section
 st.markdown("""
 <div class="hero-section">
@@ -683,7 +764,7 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Status Grid with Modern Cards
-policy_summary = components["policy_engine"].get_policy_summary()
+policy_summary = policy_engine.get_policy_summary()
 stats = components["audit_log"].get_statistics()
 
 # Get setup info for display
@@ -726,7 +807,7 @@ st.markdown(f"""
 with st.sidebar:
     st.markdown('<h2 class="sidebar-header">Brand Policies</h2>', unsafe_allow_html=True)
     
-    policy_summary = components["policy_engine"].get_policy_summary()
+    policy_summary = policy_engine.get_policy_summary()
     
     st.markdown(f'<h3 class="sidebar-subheader">Brand: {policy_summary["brand_name"]}</h3>', unsafe_allow_html=True)
     
@@ -915,14 +996,14 @@ with tab1:
                 
                 # Validate against policies
                 st.markdown("### Policy Validation")
-                is_valid, violations, warnings = components["policy_engine"].validate_prompt(prompt)
+                validation = policy_engine.validate_prompt(prompt)
+                is_valid, violations, warnings = validation
                 
-                policy_decision = {
-                    "is_valid": is_valid,
-                    "violations": violations,
-                    "warnings": warnings,
-                    "timestamp": datetime.now().isoformat()
-                }
+                policy_decision = dict(
+                    validation.to_dict(),
+                    brand=policy_summary["brand_name"],
+                    timestamp=datetime.now().isoformat()
+                )
                 
                 progress_bar.progress(60)
                 
@@ -949,11 +1030,20 @@ with tab1:
                             for warning in warnings:
                                 st.warning(f"• {warning}")
                 
+                # Enhance prompt if needed, before logging so the audit log holds the prompt actually sent
+                sent_prompt = prompt
+                if is_valid and warnings:
+                    enhanced_prompt = policy_engine.enhance_prompt(prompt)
+                    if enhanced_prompt != prompt:
+                        st.info("**Enhanced Prompt with Brand Alignment Applied**")
+                        sent_prompt = enhanced_prompt
+                
                 # Log the request
                 entry_id = components["audit_log"].log_generation_request(
                     prompt,
                     policy_decision,
-                    user="streamlit_user"
+                    user="streamlit_user",
+                    sent_prompt=sent_prompt
                 )
                 
                 if not is_valid:
@@ -964,12 +1054,7 @@ with tab1:
                     )
                     st.stop()
                 
-                # Enhance prompt if needed
-                if warnings:
-                    enhanced_prompt = components["policy_engine"].enhance_prompt(prompt)
-                    if enhanced_prompt != prompt:
-                        st.info("**Enhanced Prompt with Brand Alignment Applied**")
-                        prompt = enhanced_prompt
+                prompt = sent_prompt
                 
                 # Generated Images Section
                 st.markdown("### Generated Images")
@@ -1007,36 +1092,50 @@ with tab1:
                     progress_bar.progress(85)
                     status_text.text("🖼️ Generating brand-compliant images...")
                     
-                    # Actual generation with enhanced spinner
+                    # Lay out one slot per variant so images can be shown as they arrive
+                    completion_message = st.empty()
+                    if num_variants > 1:
+                        logger.info("📊 Multiple images - using column layout")
+                        variant_slots = st.columns(num_variants)
+                    else:
+                        logger.info("📊 Single image - using centered layout")
+                        variant_slots = [st.columns([1, 2, 1])[1]]
+                    
+                    import time
+                    start_time = time.time()
+                    
+                    logger.info(f"🎬 Starting image generation in app.py")
+                    logger.info(f"🎯 Prompt being sent: {prompt}")
+                    logger.info(f"🔢 Number of variants requested: {num_variants}")
+                    
+                    # Stream variants into their columns as each one completes
+                    results = []
                     with st.spinner(f"🎨 Generating {num_variants} brand-compliant creative variants... ⏱️ ~{estimated_time}s"):
-                        import time
-                        start_time = time.time()
-                        
-                        logger.info(f"🎬 Starting image generation in app.py")
-                        logger.info(f"🎯 Prompt being sent: {prompt}")
-                        logger.info(f"🔢 Number of variants requested: {num_variants}")
-                        
-                        results = components["fibo_client"].generate_images(
+                        for result in components["fibo_client"].iter_generate_images(
                             prompt,
-                            num_variants=num_variants
-                        )
-                        
-                        generation_time = time.time() - start_time
-                        logger.info(f"⏱️ Total generation time: {generation_time:.2f}s")
-                        logger.info(f"📊 Results received: {len(results) if results else 0} items")
-                        
-                        # Log each result for debugging
-                        if results:
-                            for i, result in enumerate(results):
-                                logger.info(f"📷 Result {i+1}: Status={result.get('status')}, Has Image={bool(result.get('image'))}")
-                        else:
-                            logger.warning("⚠️ No results returned from FIBO client")
+                            num_variants=num_variants,
+                            hedge=True,
+                            deadline=max(60, estimated_time * 2)
+                        ):
+                            results.append(result)
+                            idx = result.get("variant_id", len(results))
+                            logger.info(f"📷 Result {idx}: Status={result.get('status')}, Has Image={bool(result.get('image'))}")
+                            with variant_slots[(idx - 1) % len(variant_slots)]:
+                                render_variant_result(result, idx, compact=num_variants > 1)
+                            progress_bar.progress(85 + int(15 * min(len(results), num_variants) / num_variants))
+                            status_text.text(f"🖼️ {len(results)}/{num_variants} variants ready...")
+                    
+                    results.sort(key=lambda r: r.get("variant_id", 0))
+                    generation_time = time.time() - start_time
+                    logger.info(f"⏱️ Total generation time: {generation_time:.2f}s")
+                    logger.info(f"📊 Results received: {len(results)} items")
+                    if not results:
+                        logger.warning("⚠️ No results returned from FIBO client")
                         
                     progress_bar.progress(100)
                     status_text.text("✅ Generation completed successfully!")
                     
                     # Clear progress indicators after successful completion
-                    import time
                     time.sleep(1)
                     progress_bar.empty()
                     status_text.empty()
@@ -1046,103 +1145,15 @@ with tab1:
                     components["audit_log"].log_generation_result(entry_id, results)
                     
                     # Enhanced success/failure feedback
-                    if not results:
-                        logger.warning("⚠️ No results to display - showing unavailable message")
-                        st.warning("⚠️ **Remote FIBO generation temporarily unavailable** - Your prompt and audit log are still recorded for future processing.")
-                        st.info("💡 This demonstrates the platform's audit capabilities even during service interruptions.")
-                    else:
-                        logger.info(f"✅ Displaying {len(results)} successful results")
-                        # Show completion with metrics
-                        st.success(f"🎉 **Generation completed successfully!** ⏱️ {generation_time:.1f}s | 🛡️ Fully compliant | 📊 Audit logged")
-                        
-                        # Display images in responsive columns
-                        logger.info(f"🖼️ Preparing to display {len(results)} images")
-                        
-                        if len(results) > 1:
-                            logger.info("📊 Multiple images - using column layout")
-                            cols = st.columns(len(results))
-                            for idx, (col, result) in enumerate(zip(cols, results), start=1):
-                                logger.info(f"🎨 Processing image {idx}: Status={result.get('status')}, Has Image={bool(result.get('image'))}")
-                                with col:
-                                    if "image" in result and result["image"]:
-                                        logger.info(f"✅ Displaying image {idx}")
-                                        st.image(result["image"], use_column_width=True)
-                                        
-                                        # Enhanced caption with metadata
-                                        generation_timestamp = datetime.now().strftime("%H:%M:%S")
-                                        st.caption(f"🎯 **Variant {idx}** | 🕐 {generation_timestamp}")
-                                        
-                                        # Status indicator
-                                        if result.get("status") == "success":
-                                            st.markdown('<span class="status-pill status-success">✅ Compliant</span>', unsafe_allow_html=True)
-                                        elif result.get("status") == "safe_mode":
-                                            st.markdown('<span class="status-pill status-warning">⚡ Safe Mode Preview</span>', unsafe_allow_html=True)
-                                        else:
-                                            st.markdown('<span class="status-pill status-warning">Placeholder Mode</span>', unsafe_allow_html=True)
-                                    else:
-                                        logger.error(f"❌ Image {idx} missing or invalid: {result}")
-                                        st.error(f"Image {idx} failed to load")
-                                            
-                                    # Technical details in expander
-                                    with st.expander(f"View Details"):
-                                        metadata = result.get("metadata", {})
-                                        st.write(f"**Model:** {metadata.get('model', 'Unknown')}")
-                                        st.write(f"**Provider:** {metadata.get('provider', 'Unknown')}")
-                                        st.write(f"**Generation Time:** {result.get('generation_time', 0):.1f}s")
-                                        st.write(f"**Size:** {metadata.get('size', 'Unknown')}")
-                                        st.write(f"**Seed:** {metadata.get('seed', 'Unknown')}")
-                                        
-                                        if result.get("prompt_string"):
-                                            st.write("**Final Prompt:**")
-                                            prompt_display = result.get("prompt_string", "")
-                                            if len(prompt_display) > 200:
-                                                prompt_display = prompt_display[:200] + "..."
-                                            st.code(prompt_display)
+                    with completion_message.container():
+                        if not results:
+                            logger.warning("⚠️ No results to display - showing unavailable message")
+                            st.warning("⚠️ **Remote FIBO generation temporarily unavailable** - Your prompt and audit log are still recorded for future processing.")
+                            st.info("💡 This demonstrates the platform's audit capabilities even during service interruptions.")
                         else:
-                            # Single image - center it
-                            logger.info("📊 Single image - using centered layout")
-                            result = results[0]
-                            logger.info(f"🎨 Processing single image: Status={result.get('status')}, Has Image={bool(result.get('image'))}")
-                            
-                            col1, col2, col3 = st.columns([1, 2, 1])
-                            with col2:
-                                if "image" in result and result["image"]:
-                                    logger.info("✅ Displaying single image")
-                                    st.image(result["image"], use_column_width=True)
-                                    
-                                    # Enhanced caption with metadata  
-                                    generation_timestamp = datetime.now().strftime("%H:%M:%S")
-                                    st.caption(f"🎯 **Variant 1** | 🕐 {generation_timestamp}")
-                                    
-                                    # Status indicator
-                                    if result.get("status") == "success":
-                                        st.markdown('<span class="status-pill status-success">✅ Compliant</span>', unsafe_allow_html=True)
-                                    elif result.get("status") == "safe_mode":
-                                        st.markdown('<span class="status-pill status-warning">⚡ Safe Mode Preview</span>', unsafe_allow_html=True)
-                                    else:
-                                        st.markdown('<span class="status-pill status-warning">Placeholder Mode</span>', unsafe_allow_html=True)
-                                else:
-                                    logger.error(f"❌ Single image missing or invalid: {result}")
-                                    st.error("Image failed to load")
-                                
-                                # Technical details in expander
-                                with st.expander(f"View Details"):
-                                    metadata = result.get("metadata", {})
-                                    col_a, col_b = st.columns(2)
-                                    with col_a:
-                                        st.write(f"**Model:** {metadata.get('model', 'Unknown')}")
-                                        st.write(f"**Provider:** {metadata.get('provider', 'Unknown')}")
-                                        st.write(f"**Generation Time:** {result.get('generation_time', 0):.1f}s")
-                                    with col_b:
-                                        st.write(f"**Size:** {metadata.get('size', 'Unknown')}")
-                                        st.write(f"**Seed:** {metadata.get('seed', 'Unknown')}")
-                                    
-                                    if result.get("prompt_string"):
-                                        st.write("**Final Prompt:**")
-                                        prompt_display = result.get("prompt_string", "")
-                                        if len(prompt_display) > 200:
-                                            prompt_display = prompt_display[:200] + "..."
-                                        st.code(prompt_display)
+                            logger.info(f"✅ Displayed {len(results)} results")
+                            # Show completion with metrics
+                            st.success(f"🎉 **Generation completed successfully!** ⏱️ {generation_time:.1f}s | 🛡️ Fully compliant | 📊 Audit logged")
                 
                 except Exception as e:
                     st.error("Remote FIBO generation is temporarily unavailable. Your prompt and audit log are still recorded.")
@@ -741,8 +741,9 @@ with tab1:
                                     <h4 style="color: #3b82f6; margin-bottom: 1rem;">Variant {result['variant_id']}</h4>
                                 """, unsafe_allow_html=True)
                                 if "image" in result and result["image"]:
+                                    # LazyImage: Streamlit takes the encoded bytes directly
                                     st.image(
-                                        result["image"], 
+                                        result["image"].data,
                                         use_column_width=True
                                     )
                                     # Add custom caption
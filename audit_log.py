@@ -7,6 +7,7 @@ import json
 from datetime import datetime
 from typing import Dict, List, Optional
 import os
+from prompt_compiler import compile_prompt
 
 
 class AuditLog:
@@ -44,20 +45,24 @@ class AuditLog:
         self,
         prompt: Dict,
         policy_decision: Dict,
-        user: str = "default_user"
+        user: str = "default_user",
+        sent_prompt: Optional[Dict] = None
     ) -> str:
         """
         Log a generation request.
         
         Args:
-            prompt: The prompt used
+            prompt: The prompt as submitted
             policy_decision: Policy validation results
             user: User who made the request
+            sent_prompt: Prompt sent for generation when it differs from the
+                submitted one (e.g. after PolicyEngine.enhance_prompt)
             
         Returns:
             Entry ID
         """
         entry_id = f"gen_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        compiled = compile_prompt(prompt if sent_prompt is None else sent_prompt)
         
         entry = {
             "id": entry_id,
@@ -65,6 +70,10 @@ class AuditLog:
             "type": "generation_request",
             "user": user,
             "prompt": prompt,
+            # Hash and payload of the prompt actually sent, matching the result entry
+            "prompt_hash": compiled.prompt_hash,
+            "sent_prompt": compiled.payload,
+            "enhanced": sent_prompt is not None and sent_prompt != prompt,
             "policy_decision": policy_decision,
             "status": "approved" if policy_decision.get("is_valid", False) else "rejected"
         }
@@ -99,7 +108,11 @@ class AuditLog:
                 {
                     "variant_id": r.get("variant_id"),
                     "status": r.get("status"),
-                    "generation_time": r.get("generation_time")
+                    "prompt_hash": r.get("metadata", {}).get("prompt_hash"),
+                    "prompt_string": r.get("prompt_string"),
+                    "seed": r.get("metadata", {}).get("seed"),
+                    "generation_time": r.get("generation_time"),
+                    "timings": r.get("metadata", {}).get("timings")
                 }
                 for r in results
             ]
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Batch Runner Module
+Bulk generation of governed prompts from JSONL or CSV files.
+
+Prompts are read one at a time, validated against the brand profile,
+generated on a bounded worker pool at "batch" priority (so interactive
+users of the same process are served first) and written to an output
+directory. Every finished item is appended to a checkpoint file; an
+interrupted run started again with the same output directory skips
+items that are already done.
+
+Usage:
+    python batch_runner.py catalogue.jsonl --output-dir out/
+    python batch_runner.py catalogue.csv --output-dir out/ --variants 2 --workers 8
+"""
+
+import os
+import csv
+import json
+import time
+import logging
+import argparse
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from fibo_client import FIBOClient
+from policy_engine import PolicyEngine
+from prompt_compiler import compile_prompt
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILE = "checkpoint.jsonl"
+
+# CSV columns that hold lists, separated by "|"
+CSV_LIST_COLUMNS = ("modifiers", "colors", "elements")
+
+
+def _is_safe_item_id(item_id: str) -> bool:
+    """True when an id can be used as a single directory name inside the output directory."""
+    return bool(item_id) and not item_id.startswith(".") and not any(ch in item_id for ch in "/\\\0:")
+
+
+def _item_from_record(record: Dict[str, Any], line_num: int) -> Dict[str, Any]:
+    """
+    Normalize one input record into a batch item.
+
+    A record is either the governed prompt itself or an object with a
+    "prompt" key plus optional "id" and "num_variants". Items without an
+    id are identified by their prompt hash, which stays stable when the
+    input file is edited or reordered. The id names the item's output
+    directory, so ids that are not a plain file name (path separators,
+    leading dots such as "..") are replaced by the prompt hash as well.
+    """
+    if "prompt" in record:
+        prompt = record["prompt"]
+        if isinstance(prompt, str):
+            prompt = json.loads(prompt)
+    else:
+        prompt = {key: value for key, value in record.items() if key not in ("id", "num_variants")}
+    if not isinstance(prompt, dict):
+        raise ValueError("prompt must be a JSON object")
+
+    item_id = str(record.get("id") or "")
+    if not _is_safe_item_id(item_id):
+        if item_id:
+            logger.warning(f"⚠️ Line {line_num}: id {item_id!r} is not a safe directory name - using the prompt hash")
+        item_id = compile_prompt(prompt).prompt_hash[:16]
+    item = {"id": item_id, "prompt": prompt, "line": line_num}
+    if record.get("num_variants"):
+        item["num_variants"] = int(record["num_variants"])
+    return item
+
+
+def _csv_record(row: Dict[str, str]) -> Dict[str, Any]:
+    """Turn a CSV row into a record; empty cells are dropped and list columns split on "|"."""
+    record: Dict[str, Any] = {}
+    for key, value in row.items():
+        if key is None or value is None or not value.strip():
+            continue
+        value = value.strip()
+        if key in CSV_LIST_COLUMNS:
+            record[key] = [part.strip() for part in value.split("|") if part.strip()]
+        else:
+            record[key] = value
+    return record
+
+
+def iter_batch_items(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream batch items from a JSONL or CSV file.
+
+    The file is read lazily, so its size does not affect memory use.
+    Malformed lines are logged and skipped.
+
+    Args:
+        path: Input file; ".csv" files are read as CSV, anything else as JSONL
+
+    Yields:
+        Item dictionaries with id, prompt, line and optionally num_variants
+    """
+    is_csv = path.lower().endswith(".csv")
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        # Line 1 of a CSV file is the header
+        rows = enumerate(csv.DictReader(f), start=2) if is_csv else enumerate(f, start=1)
+        for line_num, row in rows:
+            try:
+                if is_csv:
+                    record = _csv_record(row)
+                elif row.strip():
+                    record = json.loads(row)
+                else:
+                    continue
+                if not isinstance(record, dict):
+                    raise ValueError("record must be a JSON object")
+                yield _item_from_record(record, line_num)
+            except ValueError as e:
+                logger.error(f"❌ Skipping malformed input record on line {line_num}: {e}")
+
+
+class BatchRunner:
+    """Validates, generates and checkpoints a stream of governed prompts."""
+
+    def __init__(
+        self,
+        output_dir: str,
+        client: Optional[FIBOClient] = None,
+        policy_engine: Optional[PolicyEngine] = None,
+        num_variants: int = 1,
+        max_workers: int = 4,
+        deadline: Optional[float] = None,
+        use_cache: bool = True,
+        enhance: bool = True
+    ):
+        """
+        Initialize the runner.
+
+        Args:
+            output_dir: Directory for images and the checkpoint file
+            client: FIBO client (defaults to a new FIBOClient)
+            policy_engine: Policy engine (defaults to brand_profile.json)
+            num_variants: Variants per item, unless the item sets num_variants
+            max_workers: Items generated at the same time
+            deadline: Time budget in seconds per item (None waits indefinitely)
+            use_cache: Serve and store variants through the generation cache
+            enhance: Apply PolicyEngine.enhance_prompt to prompts with warnings
+        """
+        self.output_dir = output_dir
+        self.client = client or FIBOClient()
+        self.policy_engine = policy_engine or PolicyEngine("brand_profile.json")
+        self.num_variants = num_variants
+        self.max_workers = max_workers
+        self.deadline = deadline
+        self.use_cache = use_cache
+        self.enhance = enhance
+        self.checkpoint_path = os.path.join(output_dir, CHECKPOINT_FILE)
+        self._checkpoint_lock = threading.Lock()
+        self.stats = {"done": 0, "rejected": 0, "failed": 0, "skipped": 0}
+
+        os.makedirs(output_dir, exist_ok=True)
+
+    def load_checkpoint(self) -> Set[str]:
+        """
+        Read the ids of items finished by earlier runs.
+
+        Items that were rejected by policy count as finished; failed items
+        are retried. A partially written last line (from a crash) is ignored.
+
+        Returns:
+            Set of finished item ids
+        """
+        finished: Set[str] = set()
+        if not os.path.exists(self.checkpoint_path):
+            return finished
+        with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+            line = ""
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get("status") in ("done", "rejected"):
+                    finished.add(entry["id"])
+                else:
+                    finished.discard(entry["id"])
+        if line and not line.endswith("\n"):
+            # Terminate the torn line so the next entry starts on its own line
+            with open(self.checkpoint_path, "a", encoding="utf-8") as f:
+                f.write("\n")
+        return finished
+
+    def _record(self, entry: Dict[str, Any]):
+        """Append an item's outcome to the checkpoint file and make it durable."""
+        entry = dict(entry, timestamp=time.time())
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._checkpoint_lock:
+            with open(self.checkpoint_path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self.stats[entry["status"]] += 1
+
+    def _validate(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Validate an item against the brand profile.
+
+        Returns:
+            Prompt to generate, or None if the item was rejected
+        """
+        validation = self.policy_engine.validate_prompt(item["prompt"])
+        if not validation.is_valid:
+            logger.warning(f"🚫 Item {item['id']} rejected: {'; '.join(validation.violations)}")
+            decision = validation.to_dict()
+            self._record({
+                "id": item["id"],
+                "status": "rejected",
+                "violations": decision["violations"],
+                "prohibited_matches": decision["prohibited_matches"],
+                "profile_version": decision["profile_version"]
+            })
+            return None
+        item["profile_version"] = validation.profile_version
+        prompt = item["prompt"]
+        if validation.warnings and self.enhance:
+            prompt = self.policy_engine.enhance_prompt(prompt)
+        return prompt
+
+    def _generate(self, item: Dict[str, Any], prompt: Dict[str, Any]):
+        """Generate one item, write its images and checkpoint it."""
+        start = time.time()
+        num_variants = item.get("num_variants", self.num_variants)
+        results = self.client.generate_images(
+            prompt,
+            num_variants=num_variants,
+            use_cache=self.use_cache,
+            deadline=self.deadline,
+            priority="batch"
+        )
+        succeeded = [r for r in results if r["status"] == "success"]
+        entry = {
+            "id": item["id"],
+            "profile_version": item.get("profile_version"),
+            "prompt_hash": compile_prompt(prompt).prompt_hash,
+            "seeds": {r["variant_id"]: r["metadata"]["seed"] for r in results},
+            "generation_time": round(time.time() - start, 3)
+        }
+        # Safe mode placeholders and partial results are not catalogue images
+        if len(succeeded) < num_variants:
+            logger.warning(f"⚠️ Item {item['id']}: {len(succeeded)}/{num_variants} variants generated - will retry on resume")
+            self._record(dict(entry, status="failed", statuses={r["variant_id"]: r["status"] for r in results}))
+            return
+
+        item_dir = os.path.join(self.output_dir, item["id"])
+        os.makedirs(item_dir, exist_ok=True)
+        files: List[str] = []
+        for result in succeeded:
+            image = result["image"]
+            filename = f"variant_{result['variant_id']}.{(image.format or 'png').lower()}"
+            image.save(os.path.join(item_dir, filename))
+            files.append(os.path.join(item["id"], filename))
+        self._record(dict(entry, status="done", files=files))
+        logger.info(f"✅ Item {item['id']} done ({num_variants} variants, {entry['generation_time']:.1f}s)")
+
+    def _run_item(self, item: Dict[str, Any], prompt: Dict[str, Any]):
+        try:
+            self._generate(item, prompt)
+        except Exception as e:
+            logger.error(f"❌ Item {item['id']} failed: {type(e).__name__}: {e}")
+            self._record({"id": item["id"], "status": "failed", "error": f"{type(e).__name__}: {e}"})
+
+    def run(self, items: Iterator[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Process a stream of items, resuming from the checkpoint.
+
+        At most max_workers items are generated at once and only twice
+        that many are read ahead, so memory stays flat for large inputs.
+
+        Args:
+            items: Batch items (see iter_batch_items)
+
+        Returns:
+            Counts of items done, rejected, failed and skipped (already done)
+        """
+        finished = self.load_checkpoint()
+        if finished:
+            logger.info(f"⏭️ Resuming: {len(finished)} items already finished")
+        start = time.time()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="fibo-batch")
+        pending = set()
+        try:
+            for item in items:
+                if item["id"] in finished:
+                    self.stats["skipped"] += 1
+                    continue
+                # Duplicate ids later in the input are skipped as well
+                finished.add(item["id"])
+                prompt = self._validate(item)
+                if prompt is None:
+                    continue
+                if len(pending) >= self.max_workers * 2:
+                    _, pending = wait(pending, return_when=FIRST_COMPLETED)
+                pending.add(executor.submit(self._run_item, item, prompt))
+            wait(pending)
+        finally:
+            # On interrupt, drop queued items; they are not checkpointed and run next time
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        elapsed = time.time() - start
+        logger.info(
+            f"🏁 Batch finished in {elapsed:.1f}s - done: {self.stats['done']}, rejected: {self.stats['rejected']}, "
+            f"failed: {self.stats['failed']}, skipped: {self.stats['skipped']}"
+        )
+        return dict(self.stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate brand-governed images for a file of prompts")
+    parser.add_argument("input", help="JSONL or CSV file of governed prompts")
+    parser.add_argument("--output-dir", required=True, help="Directory for images and the checkpoint file")
+    parser.add_argument("--brand-profile", default="brand_profile.json", help="Brand profile JSON file")
+    parser.add_argument("--variants", type=int, default=1, help="Variants per prompt")
+    parser.add_argument("--workers", type=int, default=4, help="Prompts generated at the same time")
+    parser.add_argument("--deadline", type=float, help="Time budget in seconds per prompt")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the generation cache")
+    parser.add_argument("--no-enhance", action="store_true", help="Do not enhance prompts that have policy warnings")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    runner = BatchRunner(
+        args.output_dir,
+        policy_engine=PolicyEngine(args.brand_profile),
+        num_variants=args.variants,
+        max_workers=args.workers,
+        deadline=args.deadline,
+        use_cache=not args.no_cache,
+        enhance=not args.no_enhance
+    )
+    try:
+        stats = runner.run(iter_batch_items(args.input))
+    except KeyboardInterrupt:
+        logger.warning("⏹️ Interrupted - run the same command again to resume")
+        raise SystemExit(130)
+    raise SystemExit(1 if stats["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
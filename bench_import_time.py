@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for fibo_client.
+
+Measures the cold-start cost of `import fibo_client` in fresh interpreter
+processes and reports which heavy dependencies the import pulled in.
+With --baseline, the same measurement is taken on another git revision
+(exported to a temporary directory) for comparison.
+
+Usage:
+    python bench_import_time.py
+    python bench_import_time.py --runs 20 --baseline HEAD~1
+"""
+
+import argparse
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+from typing import Dict, List
+
+HEAVY_MODULES = ["huggingface_hub", "requests", "urllib3", "PIL.Image", "dotenv", "streamlit", "aiohttp"]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(source_dir: str, module: str = "fibo_client", runs: int = 10) -> Dict:
+    """
+    Import a module in fresh interpreters and collect timings.
+
+    Args:
+        source_dir: Directory containing the module
+        module: Module to import
+        runs: Number of fresh processes
+
+    Returns:
+        Dictionary with per-run seconds, median, min and heavy modules loaded
+    """
+    env = dict(os.environ)
+    # Keep the measurement about imports, not about whatever .env holds
+    env.pop("HF_TOKEN", None)
+    probe = _PROBE.format(module=module, heavy=HEAVY_MODULES)
+    samples: List[float] = []
+    loaded: List[str] = []
+    # The first run compiles bytecode; it is not counted
+    for run in range(runs + 1):
+        output = subprocess.run(
+            [sys.executable, "-c", probe],
+            cwd=source_dir,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip().splitlines()[-1]
+        result = json.loads(output)
+        if run:
+            samples.append(result["seconds"])
+        loaded = result["loaded"]
+    return {
+        "samples": samples,
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "loaded": loaded
+    }
+
+
+def export_revision(revision: str, target_dir: str):
+    """Write the tree of a git revision into target_dir."""
+    archive = subprocess.run(
+        ["git", "archive", "--format=tar", revision],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        check=True
+    ).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(target_dir)
+
+
+def print_report(label: str, result: Dict):
+    print(f"📦 {label}")
+    print(f"   median: {result['median'] * 1000:.1f} ms | min: {result['min'] * 1000:.1f} ms "
+          f"({len(result['samples'])} runs)")
+    print(f"   heavy modules loaded: {', '.join(result['loaded']) or 'none'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold import time of fibo_client")
+    parser.add_argument("--runs", type=int, default=10, help="Fresh interpreter runs per tree")
+    parser.add_argument("--module", default="fibo_client", help="Module to import")
+    parser.add_argument("--baseline", help="Git revision to compare against, e.g. HEAD~1")
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    current = measure(here, args.module, args.runs)
+    print_report("working tree", current)
+
+    if args.baseline:
+        with tempfile.TemporaryDirectory() as tmp:
+            export_revision(args.baseline, tmp)
+            baseline = measure(tmp, args.module, args.runs)
+        print_report(f"baseline {args.baseline}", baseline)
+        speedup = baseline["median"] / current["median"] if current["median"] else float("inf")
+        print(f"⚡ Cold import is {speedup:.1f}x faster "
+              f"({(baseline['median'] - current['median']) * 1000:.1f} ms saved per process)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Client Pool Module
+Load balancing of remote FIBO calls across several tokens and endpoints.
+
+Each pool member wraps one InferenceClient (a Hugging Face token against
+briaai/FIBO, or a dedicated / local endpoint URL). Calls go to the
+healthy member with the fewest outstanding requests. Members that keep
+failing, or that are rate limited, are ejected for a while and then
+given another chance.
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+from huggingface_hub import AsyncInferenceClient, InferenceClient
+
+logger = logging.getLogger(__name__)
+
+FIBO_MODEL_ID = "briaai/FIBO"
+
+
+def _status_code(e: Exception) -> Optional[int]:
+    """Return the HTTP status code attached to a remote error, if any."""
+    status_code = getattr(getattr(e, "response", None), "status_code", None)
+    return status_code if isinstance(status_code, int) else None
+
+
+class PoolMember:
+    """One remote client in the pool, with its load and health state."""
+
+    def __init__(self, name: str, model: str, token: Optional[str] = None, timeout: Optional[float] = None):
+        """
+        Initialize a pool member.
+
+        Args:
+            name: Display name used in logs and metrics (never the token)
+            model: Model id or endpoint URL passed to InferenceClient
+            token: Hugging Face token for this member, if any
+            timeout: HTTP timeout in seconds for each call (None waits indefinitely)
+        """
+        self.name = name
+        self.model = model
+        self.token = token
+        self.timeout = timeout
+        self.client = InferenceClient(model, token=token, timeout=timeout)
+        self._async_client = None
+
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.health = 1.0
+        self.avg_latency: Optional[float] = None
+        self.ejections = 0
+        self.ejected_until = 0.0
+
+    def get_async_client(self):
+        """Return the member's AsyncInferenceClient, created on first use."""
+        if self._async_client is None:
+            self._async_client = AsyncInferenceClient(self.model, token=self.token, timeout=self.timeout)
+        return self._async_client
+
+    def get_client(self, timeout: Optional[float] = None):
+        """
+        Return an InferenceClient whose timeout is at most the given one.
+
+        Clients are cheap and share the process-wide HTTP session, so a
+        tighter timeout gets its own short-lived client.
+        """
+        if timeout is None or (self.timeout is not None and timeout >= self.timeout):
+            return self.client
+        return InferenceClient(self.model, token=self.token, timeout=timeout)
+
+    def is_ejected(self, now: float) -> bool:
+        return now < self.ejected_until
+
+
+class ClientPool:
+    """
+    Least-outstanding-requests balancer over several remote clients.
+
+    Exposes the same text_to_image call as InferenceClient, so it can be
+    used wherever a single client was used before.
+    """
+
+    def __init__(
+        self,
+        members: List[PoolMember],
+        eject_after_failures: int = 3,
+        eject_seconds: float = 30.0,
+        max_eject_seconds: float = 300.0,
+        health_alpha: float = 0.2
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            members: Pool members; at least one is required
+            eject_after_failures: Consecutive failures before a member is ejected
+            eject_seconds: First ejection period; doubles on each repeat ejection
+            max_eject_seconds: Cap on the ejection period
+            health_alpha: Weight of the latest call in the health and latency averages
+        """
+        if not members:
+            raise ValueError("ClientPool needs at least one member")
+        self.members = members
+        self.eject_after_failures = eject_after_failures
+        self.eject_seconds = eject_seconds
+        self.max_eject_seconds = max_eject_seconds
+        self.health_alpha = health_alpha
+        self._lock = threading.Lock()
+
+    def _acquire_member(self) -> PoolMember:
+        """
+        Pick the member for the next call and count it as outstanding.
+
+        Healthy members are preferred by fewest outstanding requests, then
+        by health score and average latency. If every member is ejected,
+        the one whose ejection ends first is used.
+        """
+        with self._lock:
+            now = time.time()
+            available = [m for m in self.members if not m.is_ejected(now)]
+            if available:
+                member = min(
+                    available,
+                    key=lambda m: (m.outstanding, -m.health, m.avg_latency or 0.0)
+                )
+            else:
+                member = min(self.members, key=lambda m: m.ejected_until)
+            member.outstanding += 1
+            member.requests += 1
+            return member
+
+    def _release_member(self, member: PoolMember, latency: float, error: Optional[Exception] = None):
+        """Update the member's load, health score and ejection state after a call."""
+        with self._lock:
+            member.outstanding -= 1
+            alpha = self.health_alpha
+            if error is None:
+                member.consecutive_failures = 0
+                member.health = (1 - alpha) * member.health + alpha
+                member.avg_latency = latency if member.avg_latency is None else (
+                    (1 - alpha) * member.avg_latency + alpha * latency
+                )
+                return
+
+            member.failures += 1
+            member.consecutive_failures += 1
+            member.health = (1 - alpha) * member.health
+            rate_limited = _status_code(error) == 429
+            if not rate_limited and member.consecutive_failures < self.eject_after_failures:
+                return
+            member.ejections += 1
+            period = min(self.max_eject_seconds, self.eject_seconds * 2 ** (member.ejections - 1))
+            member.ejected_until = time.time() + period
+            # Back on probation when the ejection ends
+            member.consecutive_failures = self.eject_after_failures - 1
+            reason = "rate limited" if rate_limited else f"{self.eject_after_failures} consecutive failures"
+            logger.warning(f"🚫 Ejecting pool member {member.name} for {period:.0f}s ({reason})")
+
+    def text_to_image(self, prompt: str, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run text_to_image on the selected member, optionally with a tighter HTTP timeout."""
+        member = self._acquire_member()
+        start = time.time()
+        try:
+            response = member.get_client(timeout).text_to_image(prompt=prompt, **kwargs)
+        except Exception as e:
+            self._release_member(member, time.time() - start, e)
+            raise
+        self._release_member(member, time.time() - start)
+        return response
+
+    async def text_to_image_async(self, prompt: str, **kwargs) -> Any:
+        """Awaitable text_to_image on the selected member (requires aiohttp)."""
+        member = self._acquire_member()
+        start = time.time()
+        try:
+            response = await member.get_async_client().text_to_image(prompt=prompt, **kwargs)
+        except asyncio.CancelledError:
+            # An abandoned call says nothing about the member's health
+            with self._lock:
+                member.outstanding -= 1
+            raise
+        except Exception as e:
+            self._release_member(member, time.time() - start, e)
+            raise
+        self._release_member(member, time.time() - start)
+        return response
+
+    def get_metrics(self) -> List[Dict[str, Any]]:
+        """
+        Get per-member load and health metrics.
+
+        Returns:
+            One dictionary per member
+        """
+        with self._lock:
+            now = time.time()
+            return [
+                {
+                    "name": m.name,
+                    "outstanding": m.outstanding,
+                    "requests": m.requests,
+                    "failures": m.failures,
+                    "health": round(m.health, 3),
+                    "avg_latency": m.avg_latency,
+                    "ejected": m.is_ejected(now),
+                    "ejected_for": max(0.0, m.ejected_until - now),
+                    "ejections": m.ejections
+                }
+                for m in self.members
+            ]
+
+
+class AsyncClientPool:
+    """Async view of a ClientPool, used in place of AsyncInferenceClient."""
+
+    def __init__(self, pool: ClientPool):
+        self.pool = pool
+
+    async def text_to_image(self, prompt: str, **kwargs) -> Any:
+        return await self.pool.text_to_image_async(prompt, **kwargs)
+
+
+def build_pool_members(
+    tokens: List[str],
+    endpoint_urls: List[str],
+    member_factory: Callable[..., PoolMember] = PoolMember,
+    timeout: Optional[float] = None
+) -> List[PoolMember]:
+    """
+    Create one pool member per token (against briaai/FIBO) and one per endpoint URL.
+
+    Endpoint members use the first token, if any, so local stand-in
+    servers can be used without one.
+
+    Args:
+        tokens: Hugging Face tokens
+        endpoint_urls: Inference endpoint URLs, e.g. http://localhost:8080
+        member_factory: Callable building a member from (name, model, token, timeout=...)
+        timeout: HTTP timeout in seconds for each member's calls
+
+    Returns:
+        List of pool members
+    """
+    members = [
+        member_factory(f"{FIBO_MODEL_ID} #{i} ({token[:6]}…)", FIBO_MODEL_ID, token, timeout=timeout)
+        for i, token in enumerate(tokens, start=1)
+    ]
+    members.extend(
+        member_factory(url, url, tokens[0] if tokens else None, timeout=timeout)
+        for url in endpoint_urls
+    )
+    return members
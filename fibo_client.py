@@ -1,324 +1,2110 @@
+"""
+FIBO Client Module
+Remote Bria FIBO image generation through the Hugging Face Inference API.
+
+Importing this module has no side effects: configuration (.env, Streamlit
+secrets, FIBO_* environment variables) is resolved on first use, or
+explicitly via configure(), and huggingface_hub, requests and PIL are only
+imported when a remote client or an image is actually needed.
+"""
+
 import os
-import json
-import io
+import asyncio
+import functools
+import importlib.util
 import time
 import random
 import logging
-from typing import List, Dict, Any, Optional
-from PIL import Image
-from huggingface_hub import InferenceClient
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Iterator, List, Dict, Any, Optional, Tuple, Union
+from generation_cache import get_generation_cache, make_cache_key
+# build_prompt_from_governed_json and generate_variant_prompt are re-exported for existing callers
+from prompt_compiler import (
+    MAX_DISTINCT_VARIANTS,
+    CompiledPrompt,
+    build_prompt_from_governed_json,
+    compile_prompt,
+    generate_variant_prompt
+)
+from lazy_image import LazyImage
+
+if TYPE_CHECKING:
+    from PIL import Image
+    from client_pool import AsyncClientPool, ClientPool
+
+logger = logging.getLogger(__name__)
+
+
+def _split_env_list(name: str) -> List[str]:
+    """Parse a comma-separated environment variable into a list of non-empty items."""
+    return [item.strip() for item in os.getenv(name, "").split(",") if item.strip()]
+
+
+class FIBOSettings:
+    """Configuration for remote FIBO generation."""
+
+    def __init__(
+        self,
+        hf_token: Optional[str] = None,
+        hf_tokens: Optional[List[str]] = None,
+        endpoint_urls: Optional[List[str]] = None,
+        max_concurrent_requests: int = 16,
+        initial_concurrent_requests: int = 4,
+        http_pool_size: Optional[int] = None,
+        circuit_failure_threshold: int = 5,
+        circuit_probe_interval: float = 30.0,
+        hedge_percentile: float = 90.0,
+        hedge_budget_ratio: float = 0.1,
+        rate_limit_per_minute: float = 120.0,
+        rate_burst: int = 8,
+        pool_eject_after_failures: int = 3,
+        pool_eject_seconds: float = 30.0,
+        request_timeout: Optional[float] = 120.0
+    ):
+        """
+        Initialize settings.
+
+        Args:
+            hf_token: Hugging Face token
+            hf_tokens: Tokens for the client pool (defaults to [hf_token])
+            endpoint_urls: Extra inference endpoint URLs for the client pool
+            max_concurrent_requests: Ceiling for text_to_image calls in flight
+                across the whole process; the adaptive limiter moves the
+                actual limit between 1 and this value
+            initial_concurrent_requests: Starting concurrency limit
+            http_pool_size: Keep-alive connections per host (defaults to
+                twice max_concurrent_requests, leaving room for hedges)
+            circuit_failure_threshold: Consecutive failures that open the circuit
+            circuit_probe_interval: Seconds before an open circuit lets a probe through
+            hedge_percentile: Latency percentile after which a hedge is sent
+            hedge_budget_ratio: Hedges earned per primary request
+            rate_limit_per_minute: Calls per minute across all priority classes (0 disables)
+            rate_burst: Calls that may be sent back to back after an idle period
+            pool_eject_after_failures: Consecutive failures before a pool member is ejected
+            pool_eject_seconds: First ejection period of a pool member
+            request_timeout: HTTP timeout in seconds for one text_to_image
+                call, lowered to a request's remaining deadline (None disables)
+        """
+        self.hf_token = hf_token
+        self.hf_tokens = hf_tokens
+        self.endpoint_urls = list(endpoint_urls or [])
+        self.max_concurrent_requests = max(1, max_concurrent_requests)
+        self.initial_concurrent_requests = max(1, initial_concurrent_requests)
+        self.http_pool_size = http_pool_size
+        self.circuit_failure_threshold = max(1, circuit_failure_threshold)
+        self.circuit_probe_interval = circuit_probe_interval
+        self.hedge_percentile = hedge_percentile
+        self.hedge_budget_ratio = hedge_budget_ratio
+        self.rate_limit_per_minute = rate_limit_per_minute
+        self.rate_burst = rate_burst
+        self.pool_eject_after_failures = pool_eject_after_failures
+        self.pool_eject_seconds = pool_eject_seconds
+        self.request_timeout = request_timeout or None
+
+    @property
+    def hf_tokens(self) -> List[str]:
+        """Tokens for the client pool; falls back to [hf_token]."""
+        return self._hf_tokens or ([self.hf_token] if self.hf_token else [])
+
+    @hf_tokens.setter
+    def hf_tokens(self, tokens: Optional[List[str]]):
+        self._hf_tokens = list(tokens or [])
+
+    @property
+    def http_pool_size(self) -> int:
+        """Keep-alive connections per host; defaults to twice max_concurrent_requests."""
+        return max(1, self._http_pool_size or self.max_concurrent_requests * 2)
+
+    @http_pool_size.setter
+    def http_pool_size(self, size: Optional[int]):
+        self._http_pool_size = size
+
+    @property
+    def remote_configured(self) -> bool:
+        """True when at least one token or endpoint URL is available."""
+        return bool(self.hf_tokens or self.endpoint_urls)
+
+    @classmethod
+    def from_env(cls) -> "FIBOSettings":
+        """
+        Build settings from the environment.
+
+        Loads .env first, reads HF_TOKEN (or HUGGINGFACE_TOKEN, or the
+        HF_TOKEN Streamlit secret) and the FIBO_* variables documented in
+        .env.example.
+
+        Returns:
+            FIBOSettings
+        """
+        from dotenv import load_dotenv
+        load_dotenv()
+
+        hf_token = os.getenv("HF_TOKEN") or os.getenv("HUGGINGFACE_TOKEN")
+        if not hf_token:
+            # Try Streamlit secrets if available
+            try:
+                import streamlit as st
+                if hasattr(st, 'secrets') and 'HF_TOKEN' in st.secrets:
+                    hf_token = st.secrets["HF_TOKEN"]
+                    logger.info("✅ HuggingFace token loaded from Streamlit secrets")
+            except Exception:
+                pass
+
+        max_concurrent = int(os.getenv("FIBO_MAX_CONCURRENT_REQUESTS", "16"))
+        return cls(
+            hf_token=hf_token,
+            hf_tokens=_split_env_list("HF_TOKENS"),
+            endpoint_urls=_split_env_list("FIBO_ENDPOINT_URLS"),
+            max_concurrent_requests=max_concurrent,
+            initial_concurrent_requests=int(os.getenv("FIBO_INITIAL_CONCURRENT_REQUESTS", "4")),
+            http_pool_size=int(os.getenv("FIBO_HTTP_POOL_SIZE", "0")) or None,
+            circuit_failure_threshold=int(os.getenv("FIBO_CIRCUIT_FAILURE_THRESHOLD", "5")),
+            circuit_probe_interval=float(os.getenv("FIBO_CIRCUIT_PROBE_INTERVAL", "30")),
+            hedge_percentile=float(os.getenv("FIBO_HEDGE_PERCENTILE", "90")),
+            hedge_budget_ratio=float(os.getenv("FIBO_HEDGE_BUDGET_RATIO", "0.1")),
+            rate_limit_per_minute=float(os.getenv("FIBO_RATE_LIMIT_PER_MINUTE", "120")),
+            rate_burst=int(os.getenv("FIBO_RATE_BURST", "8")),
+            pool_eject_after_failures=int(os.getenv("FIBO_POOL_EJECT_AFTER_FAILURES", "3")),
+            pool_eject_seconds=float(os.getenv("FIBO_POOL_EJECT_SECONDS", "30")),
+            request_timeout=float(os.getenv("FIBO_REQUEST_TIMEOUT", "120")),
+        )
+
+
+def _to_lazy_image(result) -> LazyImage:
+    """
+    Convert various response types from HuggingFace InferenceClient to a LazyImage.
+
+    The encoded bytes from the response are kept as they are; pixels are
+    only decoded when LazyImage.to_pil() is called.
+
+    Args:
+        result: Response from client.text_to_image() - could be PIL.Image, bytes, or dict
+        
+    Returns:
+        LazyImage object
+        
+    Raises:
+        TypeError: If result type is not supported
+    """
+    if isinstance(result, LazyImage):
+        return result
+    from PIL import Image
+    if isinstance(result, Image.Image):
+        return LazyImage.from_pil(result)
+    if isinstance(result, (bytes, bytearray)):
+        return LazyImage(bytes(result))
+    if isinstance(result, dict):
+        data = result.get("image") or result.get("bytes")
+        if isinstance(data, (bytes, bytearray)):
+            return LazyImage(bytes(data))
+    raise TypeError(f"Unsupported response type from remote FIBO: {type(result)}")
+
+
+# Module-level state, created by configure() on first use
+_settings: Optional[FIBOSettings] = None
+_settings_lock = threading.RLock()
+_remote_client: Optional["ClientPool"] = None
+_remote_async_client: Optional["AsyncClientPool"] = None
+# Set once the missing-aiohttp fallback has been reported
+_async_fallback_warned = False
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker guarding calls to the remote FIBO endpoint.
+
+    closed: calls pass through; consecutive failures are counted.
+    open: calls fail fast until probe_interval seconds have passed.
+    half_open: a limited number of probe calls are let through; a
+    success closes the circuit, a failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, probe_interval: float = 30.0, half_open_max_probes: int = 1):
+        """
+        Initialize circuit breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            probe_interval: Seconds to stay open before probing again
+            half_open_max_probes: Concurrent probe calls allowed while half-open
+        """
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.half_open_max_probes = half_open_max_probes
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._last_change = time.time()
+        self._transitions = 0
+        self._rejected = 0
+        self._listeners: List[Callable[[str, str], None]] = []
+
+    @property
+    def state(self) -> str:
+        """Current circuit state."""
+        with self._lock:
+            return self._state
+
+    def add_listener(self, callback: Callable[[str, str], None]):
+        """Register callback(old_state, new_state) for state changes."""
+        self._listeners.append(callback)
+
+    def _transition(self, new_state: str) -> Optional[tuple]:
+        """Change state; caller holds the lock. Returns (old, new) when changed."""
+        if new_state == self._state:
+            return None
+        old_state = self._state
+        self._state = new_state
+        self._last_change = time.time()
+        self._transitions += 1
+        if new_state == self.OPEN:
+            self._opened_at = self._last_change
+        if new_state != self.HALF_OPEN:
+            self._probes_in_flight = 0
+        return old_state, new_state
+
+    def _notify(self, change: Optional[tuple]):
+        if change is None:
+            return
+        old_state, new_state = change
+        log = logger.warning if new_state == self.OPEN else logger.info
+        log(f"🔌 FIBO circuit breaker {old_state} -> {new_state}")
+        for callback in list(self._listeners):
+            try:
+                callback(old_state, new_state)
+            except Exception as e:
+                logger.error(f"❌ Circuit breaker listener failed: {e}")
+
+    def reject_if_open(self, calls: int = 1) -> bool:
+        """
+        Fail a group of calls fast while the circuit is open.
+
+        Args:
+            calls: Number of calls being skipped, counted as rejected
+
+        Returns:
+            True when the calls were rejected, False when they may be attempted
+        """
+        with self._lock:
+            if self._state == self.OPEN and time.time() - self._opened_at < self.probe_interval:
+                self._rejected += calls
+                return True
+            return False
+
+    def allow_request(self) -> bool:
+        """
+        Decide whether a remote call may be attempted right now.
+
+        Returns:
+            True when the call may proceed, False to fail fast
+        """
+        change = None
+        with self._lock:
+            if self._state == self.OPEN and time.time() - self._opened_at >= self.probe_interval:
+                change = self._transition(self.HALF_OPEN)
+            if self._state == self.CLOSED:
+                allowed = True
+            elif self._state == self.HALF_OPEN and self._probes_in_flight < self.half_open_max_probes:
+                self._probes_in_flight += 1
+                allowed = True
+            else:
+                self._rejected += 1
+                allowed = False
+        self._notify(change)
+        return allowed
+
+    def release_probe(self):
+        """Give back a half-open probe slot for a call that ended without a verdict."""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes_in_flight > 0:
+                self._probes_in_flight -= 1
+
+    def record_success(self):
+        """Record a successful remote call."""
+        with self._lock:
+            self._consecutive_failures = 0
+            change = self._transition(self.CLOSED)
+        self._notify(change)
+
+    def record_failure(self):
+        """Record a failed remote call."""
+        change = None
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                change = self._transition(self.OPEN)
+                # Re-arm the probe timer even if already open
+                self._opened_at = time.time()
+        self._notify(change)
+
+    def get_state(self) -> Dict[str, Any]:
+        """
+        Get circuit state for monitoring.
+
+        Returns:
+            Dictionary with state, counters and timing information
+        """
+        with self._lock:
+            return {
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "probe_interval": self.probe_interval,
+                "transitions": self._transitions,
+                "rejected_calls": self._rejected,
+                "last_change": self._last_change
+            }
+
+
+_circuit_breaker: Optional[CircuitBreaker] = None
+
+
+def get_circuit_state() -> Dict[str, Any]:
+    """Return the remote circuit breaker state for monitoring."""
+    get_settings()
+    return _circuit_breaker.get_state()
+
+
+def add_circuit_listener(callback: Callable[[str, str], None]):
+    """Register callback(old_state, new_state) for circuit breaker state changes."""
+    get_settings()
+    _circuit_breaker.add_listener(callback)
+
+
+# HTTP statuses signalling that the endpoint is overloaded or still loading the model
+OVERLOAD_STATUS_CODES = (429, 503)
+
+# Priority classes of remote calls, highest first
+PRIORITY_CLASSES = ("interactive", "batch")
+
+
+def _extract_status_code(e: Exception) -> Optional[int]:
+    """Return the HTTP status code attached to a remote error, if any."""
+    response = getattr(e, 'response', None)
+    status_code = getattr(response, 'status_code', None)
+    return status_code if isinstance(status_code, int) else None
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD (additive increase, multiplicative decrease) limit on concurrent
+    remote calls.
+
+    Every successful call with normal latency raises the limit by 1/limit,
+    i.e. by one slot per window of successes. HTTP 429/503 responses or a
+    latency well above the observed baseline cut the limit by backoff_ratio,
+    at most once per baseline latency so a burst of failures from the same
+    window only counts once. Waiting callers, sync or async, are served by
+    priority class and FIFO within a class, so queued batch calls never
+    hold back an interactive one.
+    """
+
+    def __init__(
+        self,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        initial_limit: int = 4,
+        backoff_ratio: float = 0.5,
+        latency_tolerance: float = 2.0,
+        priorities: Tuple[str, ...] = PRIORITY_CLASSES
+    ):
+        """
+        Initialize limiter.
+
+        Args:
+            min_limit: Lowest allowed concurrency
+            max_limit: Highest allowed concurrency
+            initial_limit: Starting concurrency
+            backoff_ratio: Factor applied to the limit on overload
+            latency_tolerance: Latency above baseline * tolerance counts as overload
+            priorities: Priority class names, highest priority first
+        """
+        self.min_limit = min_limit
+        self.max_limit = max(min_limit, max_limit)
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+
+        self._lock = threading.Lock()
+        self._limit = float(min(max(initial_limit, min_limit), self.max_limit))
+        self._in_flight = 0
+        self.priorities = tuple(priorities)
+        self._waiters: Dict[str, deque] = {name: deque() for name in self.priorities}
+        self._baseline_latency: Optional[float] = None
+        self._last_decrease = 0.0
+        self._increases = 0
+        self._decreases = 0
+
+    @property
+    def limit(self) -> int:
+        """Current concurrency limit."""
+        with self._lock:
+            return int(self._limit)
+
+    def _queue(self, priority: str) -> deque:
+        """Waiter queue of a priority class; caller holds the lock."""
+        queue = self._waiters.get(priority)
+        if queue is None:
+            raise ValueError(f"Unknown priority class '{priority}' (expected one of {', '.join(self.priorities)})")
+        return queue
+
+    def _try_take(self) -> bool:
+        """Take a free slot if nobody is queued for one; caller holds the lock."""
+        if self._in_flight < int(self._limit) and not any(self._waiters.values()):
+            self._in_flight += 1
+            return True
+        return False
+
+    def _grant_waiters(self):
+        """Hand free slots to queued waiters, highest priority first; caller holds the lock."""
+        for name in self.priorities:
+            queue = self._waiters[name]
+            while queue and self._in_flight < int(self._limit):
+                waiter = queue.popleft()
+                self._in_flight += 1
+                if isinstance(waiter, threading.Event):
+                    waiter.set()
+                else:
+                    loop, future = waiter
+                    loop.call_soon_threadsafe(_resolve_future, future)
+
+    def acquire(self, timeout: Optional[float] = None, priority: str = "interactive") -> bool:
+        """
+        Block until a call slot is available.
+
+        Args:
+            timeout: Maximum seconds to wait (None waits forever)
+            priority: Priority class of the call
+
+        Returns:
+            True when a slot was acquired, False on timeout
+        """
+        with self._lock:
+            queue = self._queue(priority)
+            if self._try_take():
+                return True
+            event = threading.Event()
+            queue.append(event)
+        if event.wait(timeout):
+            return True
+        with self._lock:
+            if event in queue:
+                queue.remove(event)
+                return False
+        # Granted between the timeout and taking the lock
+        return True
+
+    async def acquire_async(self, priority: str = "interactive"):
+        """
+        Wait on the running event loop until a call slot is available.
+
+        Args:
+            priority: Priority class of the call
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            queue = self._queue(priority)
+            if self._try_take():
+                return
+            waiter = (loop, loop.create_future())
+            queue.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in queue:
+                    queue.remove(waiter)
+                    raise
+            self.release()
+            raise
+
+    def release(self):
+        """Return a call slot."""
+        with self._lock:
+            self._in_flight -= 1
+            self._grant_waiters()
+
+    def _decrease(self, reason: str):
+        """Multiplicative decrease; caller holds the lock."""
+        now = time.time()
+        if now - self._last_decrease < (self._baseline_latency or 0.0):
+            return
+        old_limit = int(self._limit)
+        self._limit = max(float(self.min_limit), self._limit * self.backoff_ratio)
+        self._last_decrease = now
+        self._decreases += 1
+        logger.warning(f"📉 FIBO concurrency limit {old_limit} -> {int(self._limit)} ({reason})")
+
+    def record_success(self, latency: float):
+        """
+        Record a successful call.
+
+        Args:
+            latency: Remote call duration in seconds
+        """
+        with self._lock:
+            baseline = self._baseline_latency
+            # Slow samples are folded in as well, so the baseline follows a
+            # lasting shift in latency instead of cutting the limit forever
+            self._baseline_latency = latency if baseline is None else 0.9 * baseline + 0.1 * latency
+            if baseline is not None and latency > baseline * self.latency_tolerance:
+                self._decrease(f"latency {latency:.1f}s vs baseline {baseline:.1f}s")
+                return
+            old_limit = int(self._limit)
+            self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+            if int(self._limit) > old_limit:
+                self._increases += 1
+                logger.info(f"📈 FIBO concurrency limit {old_limit} -> {int(self._limit)}")
+            self._grant_waiters()
+
+    def record_failure(self, status_code: Optional[int] = None):
+        """
+        Record a failed call; only overload statuses shrink the limit.
+
+        Args:
+            status_code: HTTP status of the failure, if known
+        """
+        if status_code not in OVERLOAD_STATUS_CODES:
+            return
+        with self._lock:
+            self._decrease(f"HTTP {status_code}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get limiter metrics.
+
+        Returns:
+            Dictionary with current limit, in-flight and queued calls (also per priority class)
+        """
+        with self._lock:
+            return {
+                "limit": int(self._limit),
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "in_flight": self._in_flight,
+                "queued": sum(len(queue) for queue in self._waiters.values()),
+                "queued_by_priority": {name: len(queue) for name, queue in self._waiters.items()},
+                "baseline_latency": self._baseline_latency,
+                "increases": self._increases,
+                "decreases": self._decreases
+            }
+
+
+def _resolve_future(future: "asyncio.Future"):
+    if not future.done():
+        future.set_result(None)
+
+
+_concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None
+
+
+def get_concurrency_metrics() -> Dict[str, Any]:
+    """Return adaptive concurrency limiter metrics for monitoring."""
+    get_settings()
+    return _concurrency_limiter.get_metrics()
+
+
+class HedgingPolicy:
+    """
+    Decides when to send a duplicate (hedge) request for a slow call.
+
+    The hedge delay is a percentile of recently observed remote latencies.
+    Hedges are paid for from a budget that grows by budget_ratio per
+    primary request, so at most that fraction of calls is duplicated.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 90.0,
+        budget_ratio: float = 0.1,
+        max_budget: float = 10.0,
+        min_samples: int = 20,
+        window: int = 200
+    ):
+        """
+        Initialize hedging policy.
+
+        Args:
+            percentile: Latency percentile after which a hedge is sent
+            budget_ratio: Hedges earned per primary request
+            max_budget: Cap on accumulated hedge budget
+            min_samples: Latency samples required before hedging starts
+            window: Number of recent latencies kept
+        """
+        self.percentile = percentile
+        self.budget_ratio = budget_ratio
+        self.max_budget = max_budget
+        self.min_samples = min_samples
+
+        self._lock = threading.Lock()
+        self._latencies: deque = deque(maxlen=window)
+        self._budget = 0.0
+        self.primary_requests = 0
+        self.hedges_sent = 0
+        self.hedge_wins = 0
+        self.hedges_denied = 0
+
+    def record_latency(self, latency: float):
+        """Record the latency of a successful remote call."""
+        with self._lock:
+            self._latencies.append(latency)
+
+    def hedge_delay(self) -> Optional[float]:
+        """
+        Register a primary request and return how long to wait before hedging.
+
+        Returns:
+            Delay in seconds, or None while too few latencies are known
+        """
+        with self._lock:
+            self.primary_requests += 1
+            self._budget = min(self.max_budget, self._budget + self.budget_ratio)
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+            index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+            return ordered[index]
+
+    def try_spend(self) -> bool:
+        """Take one hedge from the budget; False when the budget is exhausted."""
+        with self._lock:
+            if self._budget < 1.0:
+                self.hedges_denied += 1
+                return False
+            self._budget -= 1.0
+            self.hedges_sent += 1
+            return True
+
+    def record_hedge_win(self):
+        """Record that the hedge returned before the primary call."""
+        with self._lock:
+            self.hedge_wins += 1
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get hedging metrics.
+
+        Returns:
+            Dictionary with hedge counts, budget and current hedge delay
+        """
+        with self._lock:
+            ordered = sorted(self._latencies)
+            delay = None
+            if len(ordered) >= self.min_samples:
+                delay = ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))]
+            return {
+                "percentile": self.percentile,
+                "hedge_delay": delay,
+                "budget": self._budget,
+                "primary_requests": self.primary_requests,
+                "hedges_sent": self.hedges_sent,
+                "hedge_wins": self.hedge_wins,
+                "hedges_denied": self.hedges_denied
+            }
+
+
+_hedging_policy: Optional[HedgingPolicy] = None
+
+# Threads running primary and hedge calls in hedging mode; they are never
+# used to submit further work, so nested use from variant workers is safe.
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_hedging_metrics() -> Dict[str, Any]:
+    """Return hedged request metrics for monitoring."""
+    get_settings()
+    return _hedging_policy.get_metrics()
+
+
+class RequestScheduler:
+    """
+    Token-bucket rate limiter for remote FIBO calls with priority classes.
+
+    Tokens refill at rate_per_second up to burst. A waiting call is only
+    granted a token when it is first in its class and no higher-priority
+    class has anyone waiting, so batch traffic uses spare capacity but
+    never delays interactive users.
+    """
+
+    def __init__(self, rate_per_second: float = 2.0, burst: int = 8, priorities: Tuple[str, ...] = PRIORITY_CLASSES):
+        """
+        Initialize the scheduler.
+
+        Args:
+            rate_per_second: Sustained calls per second (0 disables rate limiting)
+            burst: Maximum tokens that can accumulate while idle
+            priorities: Priority class names, highest priority first
+        """
+        self.rate_per_second = rate_per_second
+        self.burst = max(1, burst)
+        self.priorities = priorities
+
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._queues: Dict[str, deque] = {name: deque() for name in priorities}
+        self._stats: Dict[str, Dict[str, float]] = {
+            name: {"granted": 0, "timeouts": 0, "max_queue_depth": 0, "total_wait": 0.0, "max_wait": 0.0}
+            for name in priorities
+        }
+
+    def _check_priority(self, priority: str):
+        if priority not in self._queues:
+            raise ValueError(f"Unknown priority class '{priority}' (expected one of {', '.join(self.priorities)})")
+
+    def _refill(self):
+        """Add tokens for the time elapsed since the last refill; caller holds the lock."""
+        now = time.monotonic()
+        self._tokens = min(float(self.burst), self._tokens + (now - self._last_refill) * self.rate_per_second)
+        self._last_refill = now
+
+    def _enqueue(self, priority: str) -> object:
+        """Queue a ticket for a waiting call; caller holds the lock."""
+        ticket = object()
+        queue = self._queues[priority]
+        queue.append(ticket)
+        stats = self._stats[priority]
+        stats["max_queue_depth"] = max(stats["max_queue_depth"], len(queue))
+        return ticket
+
+    def _try_take(self, ticket: object, priority: str, queued_at: float) -> Tuple[bool, Optional[float]]:
+        """
+        Grant a token to ticket if it is next in line; caller holds the lock.
+
+        Returns:
+            (granted, seconds until the next token if ticket is next in line)
+        """
+        for name in self.priorities:
+            if name == priority:
+                break
+            if self._queues[name]:
+                return False, None
+        queue = self._queues[priority]
+        if queue[0] is not ticket:
+            return False, None
+        self._refill()
+        if self._tokens < 1:
+            return False, (1 - self._tokens) / self.rate_per_second
+        self._tokens -= 1
+        queue.popleft()
+        waited = time.monotonic() - queued_at
+        stats = self._stats[priority]
+        stats["granted"] += 1
+        stats["total_wait"] += waited
+        stats["max_wait"] = max(stats["max_wait"], waited)
+        self._condition.notify_all()
+        return True, None
+
+    def _abandon(self, ticket: object, priority: str):
+        """Drop a ticket that gave up waiting; caller holds the lock."""
+        self._queues[priority].remove(ticket)
+        self._stats[priority]["timeouts"] += 1
+        self._condition.notify_all()
+
+    def acquire(self, priority: str = "interactive", timeout: Optional[float] = None) -> bool:
+        """
+        Block until the call may be sent.
+
+        Args:
+            priority: Priority class of the call
+            timeout: Maximum seconds to wait (None waits forever)
+
+        Returns:
+            True when a token was granted, False on timeout
+        """
+        self._check_priority(priority)
+        if self.rate_per_second <= 0:
+            return True
+        queued_at = time.monotonic()
+        give_up_at = queued_at + timeout if timeout is not None else None
+        with self._condition:
+            ticket = self._enqueue(priority)
+            while True:
+                granted, next_token_in = self._try_take(ticket, priority, queued_at)
+                if granted:
+                    return True
+                wait_for = next_token_in
+                if give_up_at is not None:
+                    remaining = give_up_at - time.monotonic()
+                    if remaining <= 0:
+                        self._abandon(ticket, priority)
+                        return False
+                    wait_for = remaining if wait_for is None else min(wait_for, remaining)
+                self._condition.wait(wait_for)
+
+    async def acquire_async(self, priority: str = "interactive"):
+        """Wait on the running event loop until the call may be sent."""
+        self._check_priority(priority)
+        if self.rate_per_second <= 0:
+            return
+        queued_at = time.monotonic()
+        with self._lock:
+            ticket = self._enqueue(priority)
+        try:
+            while True:
+                with self._lock:
+                    granted, next_token_in = self._try_take(ticket, priority, queued_at)
+                if granted:
+                    return
+                # Threads waiting on the condition cannot wake the loop, so poll
+                await asyncio.sleep(min(next_token_in, 0.05) if next_token_in is not None else 0.05)
+        except asyncio.CancelledError:
+            with self._lock:
+                if ticket in self._queues[priority]:
+                    self._abandon(ticket, priority)
+            raise
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get scheduler metrics.
+
+        Returns:
+            Dictionary with the bucket state and per-class queue depth and wait times
+        """
+        with self._lock:
+            if self.rate_per_second > 0:
+                self._refill()
+            classes = {}
+            for name in self.priorities:
+                stats = self._stats[name]
+                classes[name] = {
+                    "queue_depth": len(self._queues[name]),
+                    "max_queue_depth": stats["max_queue_depth"],
+                    "granted": stats["granted"],
+                    "timeouts": stats["timeouts"],
+                    "avg_wait": stats["total_wait"] / stats["granted"] if stats["granted"] else 0.0,
+                    "max_wait": stats["max_wait"]
+                }
+            return {
+                "rate_per_second": self.rate_per_second,
+                "burst": self.burst,
+                "tokens": self._tokens,
+                "classes": classes
+            }
+
+
+_request_scheduler: Optional[RequestScheduler] = None
+
+
+def get_scheduler_metrics() -> Dict[str, Any]:
+    """Return rate scheduler metrics for monitoring."""
+    get_settings()
+    return _request_scheduler.get_metrics()
+
+
+def configure(settings: Optional[FIBOSettings] = None, **overrides) -> FIBOSettings:
+    """
+    Resolve configuration and create the shared limiter, breaker and scheduler.
+
+    Called automatically on first use with settings from the environment.
+    Call it explicitly (before the first generation) to configure the
+    client in code; calling it again replaces the shared state and the
+    remote client pool.
+
+    Args:
+        settings: Settings to use (defaults to FIBOSettings.from_env())
+        **overrides: FIBOSettings attributes to override
+
+    Returns:
+        The active settings
+    """
+    global _settings, _remote_client, _remote_async_client
+    global _circuit_breaker, _concurrency_limiter, _hedging_policy, _hedge_executor, _request_scheduler
+    with _settings_lock:
+        settings = settings or FIBOSettings.from_env()
+        for name, value in overrides.items():
+            if not hasattr(settings, name):
+                raise TypeError(f"Unknown FIBO setting '{name}'")
+            setattr(settings, name, value)
+
+        if settings.hf_token:
+            logger.info("✅ HuggingFace token loaded successfully")
+            logger.info(f"Token length: {len(settings.hf_token)} characters")
+            logger.info(f"Token prefix: {settings.hf_token[:10]}...")
+        elif not settings.remote_configured:
+            logger.error("❌ HF_TOKEN not found in .env file or Streamlit secrets. Please configure your HuggingFace token.")
+
+        old_executor = _hedge_executor
+        _circuit_breaker = CircuitBreaker(
+            failure_threshold=settings.circuit_failure_threshold,
+            probe_interval=settings.circuit_probe_interval,
+        )
+        _concurrency_limiter = AdaptiveConcurrencyLimiter(
+            max_limit=settings.max_concurrent_requests,
+            initial_limit=settings.initial_concurrent_requests,
+        )
+        _hedging_policy = HedgingPolicy(
+            percentile=settings.hedge_percentile,
+            budget_ratio=settings.hedge_budget_ratio,
+        )
+        _hedge_executor = ThreadPoolExecutor(
+            max_workers=settings.max_concurrent_requests * 2, thread_name_prefix="fibo-hedge"
+        )
+        _request_scheduler = RequestScheduler(
+            rate_per_second=settings.rate_limit_per_minute / 60,
+            burst=settings.rate_burst,
+        )
+        if _settings is not None:
+            # New tokens or endpoints take effect on the next call
+            _remote_client = None
+            _remote_async_client = None
+        _settings = settings
+        if old_executor is not None:
+            old_executor.shutdown(wait=False)
+        return settings
+
+
+def get_settings() -> FIBOSettings:
+    """Return the active settings, configuring from the environment on first use."""
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                configure()
+    return _settings
+
+
+# Module attributes kept for callers that read configuration directly
+_SETTINGS_ATTRIBUTES = {
+    "hf_token": "hf_token",
+    "HF_TOKEN": "hf_token",
+    "HF_TOKENS": "hf_tokens",
+    "FIBO_ENDPOINT_URLS": "endpoint_urls",
+    "MAX_CONCURRENT_REQUESTS": "max_concurrent_requests",
+    "INITIAL_CONCURRENT_REQUESTS": "initial_concurrent_requests",
+    "HTTP_POOL_SIZE": "http_pool_size",
+}
+
+
+def __getattr__(name: str):
+    if name in _SETTINGS_ATTRIBUTES:
+        return getattr(get_settings(), _SETTINGS_ATTRIBUTES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _load_pipeline():
+    """
+    Initialize and return the module-level pool of Hugging Face InferenceClients.
+    Returns None when neither a token nor an endpoint URL is configured.
+    """
+    global _remote_client
+    settings = get_settings()
+    if _remote_client is not None:
+        logger.info("✅ Using existing remote client")
+        return _remote_client
+
+    if not settings.remote_configured:
+        logger.error("❌ No HF_TOKEN found. Set HF_TOKEN to your Hugging Face token.")
+        return None
+
+    try:
+        logger.info("🔄 Initializing HuggingFace InferenceClient pool for briaai/FIBO...")
+        from client_pool import ClientPool, build_pool_members
+        from http_pool import configure_http_pool
+        configure_http_pool(pool_maxsize=settings.http_pool_size)
+        _remote_client = ClientPool(
+            build_pool_members(settings.hf_tokens, settings.endpoint_urls, timeout=settings.request_timeout),
+            eject_after_failures=settings.pool_eject_after_failures,
+            eject_seconds=settings.pool_eject_seconds,
+        )
+        logger.info(f"✅ Remote InferenceClient pool initialized with {len(_remote_client.members)} member(s)")
+        return _remote_client
+    except Exception as e:
+        logger.error(f"❌ Failed to initialize remote InferenceClient: {e}")
+        logger.error(f"Error type: {type(e).__name__}")
+        _circuit_breaker.record_failure()
+        _remote_client = None
+        return None
+
+
+def _load_async_pipeline() -> Optional["AsyncClientPool"]:
+    """
+    Return an async view of the client pool, sharing its members' load
+    and health state with sync calls.
+    Returns None when no remote client is configured or aiohttp is not
+    installed; callers then fall back to running the sync client in a
+    worker thread.
+    """
+    global _remote_async_client, _async_fallback_warned
+    if _remote_async_client is not None:
+        return _remote_async_client
+
+    if importlib.util.find_spec("aiohttp") is None:
+        if not _async_fallback_warned:
+            _async_fallback_warned = True
+            logger.warning(
+                "⚠️ aiohttp not installed - async calls fall back to the sync client and block "
+                "one worker thread per in-flight generation (pip install -r requirements.txt)"
+            )
+        return None
+
+    from client_pool import AsyncClientPool, ClientPool
+    pool = _load_pipeline()
+    if not isinstance(pool, ClientPool):
+        return None
+    _remote_async_client = AsyncClientPool(pool)
+    return _remote_async_client
+
+
+def get_pool_metrics() -> List[Dict[str, Any]]:
+    """Return per-member load and health metrics of the client pool for monitoring."""
+    if _remote_client is None:
+        return []
+    from client_pool import ClientPool
+    return _remote_client.get_metrics() if isinstance(_remote_client, ClientPool) else []
+
+
+def is_pipeline_loaded() -> bool:
+    """Return True when the remote InferenceClient is available."""
+    return _load_pipeline() is not None
+
+
+def is_remote_enabled() -> bool:
+    """Return True when remote FIBO generation is properly configured."""
+    return get_settings().remote_configured and is_pipeline_loaded()
+
+
+def get_client_status() -> dict:
+    """Get detailed client status for UI display."""
+    from http_pool import get_http_pool_metrics
+    client = _load_pipeline()
+    return {
+        "remote_available": client is not None,
+        "token_configured": bool(get_settings().hf_tokens),
+        "mode": "remote" if client is not None else "safe_mode",
+        "model": "briaai/FIBO" if client is not None else "placeholder",
+        "cache": get_generation_cache().get_statistics(),
+        "in_flight": get_inflight_metrics(),
+        "circuit": get_circuit_state(),
+        "concurrency": get_concurrency_metrics(),
+        "hedging": get_hedging_metrics(),
+        "scheduler": get_scheduler_metrics(),
+        "pool": get_pool_metrics(),
+        "http_pool": get_http_pool_metrics()
+    }
+
+
+class SingleFlight:
+    """
+    Registry of in-flight remote calls keyed by request identity.
+
+    Concurrent callers asking for the same key attach to the call that is
+    already running and all receive its result, so identical prompts from
+    several sessions hit the endpoint once.
+    """
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self._waiters: Dict[str, int] = {}
+        self.leader_calls = 0
+        self.deduplicated_calls = 0
+
+    def _join(self, key: str):
+        """Return (future, is_leader) for key, registering a new call if needed."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self._waiters[key] += 1
+                self.deduplicated_calls += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self._waiters[key] = 0
+            self.leader_calls += 1
+            return future, True
+
+    def _finish(self, key: str, future: Future, result: Any = None, error: Optional[BaseException] = None):
+        with self._lock:
+            self._calls.pop(key, None)
+            waiters = self._waiters.pop(key, 0)
+        if waiters:
+            logger.info(f"🔗 Shared in-flight result {key[:12]} with {waiters} waiting request(s)")
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: str, fn: Callable[[], Any], retry_if: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Run fn once per key among concurrent callers.
+
+        A waiting caller makes the call itself (sharing it again with other
+        waiters) when the shared call was cancelled, or when retry_if says
+        the shared result does not apply to it, e.g. because it was cut
+        short by the first caller's deadline.
+
+        Args:
+            key: Request identity (e.g. a generation cache key)
+            fn: Zero-argument callable performing the remote call
+            retry_if: Predicate on a shared result; True makes the waiter retry
+
+        Returns:
+            Result of the (possibly shared) call
+        """
+        future, is_leader = self._join(key)
+        while not is_leader:
+            try:
+                result = future.result()
+            except asyncio.CancelledError:
+                result = None
+            else:
+                if retry_if is None or not retry_if(result):
+                    return result
+            future, is_leader = self._join(key)
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    async def do_async(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        retry_if: Optional[Callable[[Any], bool]] = None
+    ) -> Any:
+        """
+        Awaitable counterpart of do; shares calls with sync callers too.
+
+        Args:
+            key: Request identity (e.g. a generation cache key)
+            fn: Zero-argument coroutine function performing the remote call
+            retry_if: Predicate on a shared result; True makes the waiter retry
+
+        Returns:
+            Result of the (possibly shared) call
+        """
+        future, is_leader = self._join(key)
+        while not is_leader:
+            try:
+                result = await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                if asyncio.current_task().cancelling():
+                    raise
+                # The shared call was abandoned by another request's deadline
+            else:
+                if retry_if is None or not retry_if(result):
+                    return result
+            future, is_leader = self._join(key)
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    def get_metrics(self) -> Dict[str, int]:
+        """
+        Get in-flight deduplication metrics.
+
+        Returns:
+            Dictionary with in-flight, waiter and deduplication counts
+        """
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "waiters": sum(self._waiters.values()),
+                "leader_calls": self.leader_calls,
+                "deduplicated_calls": self.deduplicated_calls
+            }
+
+
+_single_flight = SingleFlight()
+
+
+def get_inflight_metrics() -> Dict[str, int]:
+    """Return single-flight deduplication metrics for monitoring."""
+    return _single_flight.get_metrics()
+
+
+def _log_remote_error(e: Exception, variant_num: int):
+    """Log detailed information about a failed remote generation call."""
+    logger.error(f"❌ Remote generation error for variant {variant_num}: {e}")
+    logger.error(f"❌ Error type: {type(e).__name__}")
+
+    # Log detailed error information
+    if hasattr(e, 'response'):
+        status_code = _extract_status_code(e) or 'unknown'
+        logger.error(f"❌ HTTP Status: {status_code}")
+
+        # Try to get response text if available
+        try:
+            response_text = getattr(e.response, 'text', 'No response text')
+            logger.error(f"❌ Response text: {response_text}")
+        except:
+            logger.error("❌ Could not get response text")
+
+    if hasattr(e, 'message'):
+        logger.error(f"❌ Error message: {e.message}")
+
+
+def _make_timings(**measured: float) -> Dict[str, float]:
+    """Build a per-variant timing breakdown (seconds); unmeasured phases are 0."""
+    timings = {"queue_wait": 0.0, "connect": 0.0, "remote_call": 0.0, "decode": 0.0, "total": 0.0}
+    timings.update(measured)
+    return timings
+
+
+def _make_outcome(
+    variant_num: int,
+    status: str,
+    image: Optional[LazyImage] = None,
+    timings: Optional[Dict[str, float]] = None
+) -> Dict[str, Any]:
+    """
+    Build the per-variant outcome yielded by the image iterators.
+
+    Args:
+        variant_num: Variant number (1-indexed)
+        status: "success", "failed" or "deadline_exceeded"
+        image: Generated image (None unless status is "success")
+        timings: Timing breakdown from _make_timings
+
+    Returns:
+        Outcome dictionary
+    """
+    return {
+        "variant_id": variant_num,
+        "status": status,
+        "image": image,
+        "timings": timings if timings is not None else _make_timings()
+    }
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a request's time budget runs out before a remote call completes."""
+
+
+def _remaining(deadline_at: Optional[float]) -> Optional[float]:
+    """Seconds left until deadline_at (never negative), or None without a deadline."""
+    if deadline_at is None:
+        return None
+    return max(0.0, deadline_at - time.time())
+
+
+def _call_remote(
+    client,
+    variant_prompt: str,
+    deadline_at: Optional[float] = None,
+    priority: str = "interactive",
+    seed: Optional[int] = None,
+    started: Optional[threading.Event] = None
+) -> Tuple[Any, Dict[str, float]]:
+    """
+    Run one text_to_image call through the rate scheduler and under the
+    adaptive concurrency limiter. seed is sent along when given; started
+    is set once the call holds its slot and is sent.
+
+    Raises:
+        DeadlineExceeded: If the deadline passes while waiting for a slot
+
+    Returns:
+        (response, timings) with queue_wait, connect (new connection and
+        TLS setup) and remote_call (the rest of the call) measured
+    """
+    from http_pool import thread_connect_seconds
+    # Bind the shared state once so a concurrent configure() cannot split a call
+    limiter, hedging_policy = _concurrency_limiter, _hedging_policy
+    queue_start = time.time()
+    if not _request_scheduler.acquire(priority, timeout=_remaining(deadline_at)):
+        raise DeadlineExceeded("deadline exceeded while waiting for the FIBO rate limit")
+    if not limiter.acquire(timeout=_remaining(deadline_at), priority=priority):
+        raise DeadlineExceeded("deadline exceeded while waiting for a FIBO call slot")
+    if started is not None:
+        started.set()
+    call_start = time.time()
+    connect_mark = thread_connect_seconds()
+    # An abandoned call (e.g. a hedge loser) must not hold its slot past the deadline
+    remaining = _remaining(deadline_at)
+    timeout_kwargs = {"timeout": max(remaining, 0.1)} if remaining is not None else {}
+    try:
+        response = client.text_to_image(prompt=variant_prompt, seed=seed, **timeout_kwargs)
+    except Exception as e:
+        if deadline_at is not None and time.time() >= deadline_at:
+            # Timed out on our own budget, not an endpoint failure
+            raise DeadlineExceeded("deadline exceeded waiting for FIBO response") from e
+        limiter.record_failure(_extract_status_code(e))
+        raise
+    finally:
+        limiter.release()
+    latency = time.time() - call_start
+    connect = min(latency, thread_connect_seconds() - connect_mark)
+    limiter.record_success(latency)
+    hedging_policy.record_latency(latency)
+    return response, _make_timings(queue_wait=call_start - queue_start, connect=connect, remote_call=latency - connect)
 
-# Configure logging for debugging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
 
-# Load environment variables from .env file at startup
-from dotenv import load_dotenv
-load_dotenv()
+def _call_remote_hedged(
+    client,
+    variant_prompt: str,
+    deadline_at: Optional[float] = None,
+    priority: str = "interactive",
+    seed: Optional[int] = None
+) -> Tuple[Any, Dict[str, float]]:
+    """
+    Run a text_to_image call, sending a duplicate if the first one is slower
+    than the hedging percentile, and return whichever succeeds first.
+    The hedge delay counts from when the first call gets its call slot, so
+    time spent queued behind the limiters never triggers a hedge. No hedge
+    is sent when the deadline would pass before the hedge delay.
 
-# Load and validate HF_TOKEN (works with both .env files and Streamlit secrets)
-hf_token = os.getenv("HF_TOKEN")
-if not hf_token:
-    # Try Streamlit secrets if available
-    try:
-        import streamlit as st
-        if hasattr(st, 'secrets') and 'HF_TOKEN' in st.secrets:
-            hf_token = st.secrets["HF_TOKEN"]
-            logger.info("✅ HuggingFace token loaded from Streamlit secrets")
-    except:
-        pass
-
-if hf_token:
-    if not hasattr(hf_token, '__name__'):  # Not from streamlit secrets
-        logger.info("✅ HuggingFace token loaded successfully from .env")
-        logger.info(f"Token length: {len(hf_token)} characters")
-        logger.info(f"Token prefix: {hf_token[:10]}...")
-else:
-    logger.error("❌ HF_TOKEN not found in .env file or Streamlit secrets. Please configure your HuggingFace token.")
-
-def _to_pil_image(result):
-    """
-    Convert various response types from HuggingFace InferenceClient to PIL.Image.
-    
-    Args:
-        result: Response from client.text_to_image() - could be PIL.Image, bytes, or dict
-        
-    Returns:
-        PIL.Image.Image object
-        
     Raises:
-        TypeError: If result type is not supported
+        DeadlineExceeded: If no call has returned when the deadline passes
     """
-    if isinstance(result, Image.Image):
-        return result
-    if isinstance(result, (bytes, bytearray)):
-        return Image.open(io.BytesIO(result)).convert("RGB")
-    if isinstance(result, dict):
-        data = result.get("image") or result.get("bytes")
-        if isinstance(data, (bytes, bytearray)):
-            return Image.open(io.BytesIO(data)).convert("RGB")
-    raise TypeError(f"Unsupported response type from remote FIBO: {type(result)}")
-
+    started = threading.Event()
+    primary = _hedge_executor.submit(_call_remote, client, variant_prompt, deadline_at, priority, seed, started)
+    primary.add_done_callback(lambda _: started.set())
+    delay = _hedging_policy.hedge_delay()
+    if delay is not None and not started.wait(_remaining(deadline_at)):
+        raise DeadlineExceeded("deadline exceeded while waiting for a FIBO call slot")
+    remaining = _remaining(deadline_at)
+    if delay is not None and remaining is not None and remaining <= delay:
+        delay = None
+    if delay is None or wait([primary], timeout=delay).done or not _hedging_policy.try_spend():
+        if not wait([primary], timeout=_remaining(deadline_at)).done:
+            raise DeadlineExceeded("deadline exceeded waiting for FIBO response")
+        return primary.result()
 
-# Module-level remote client state
-HF_TOKEN = hf_token  # Use the token loaded at startup
-_remote_client: Optional[InferenceClient] = None
+    logger.info(f"🏇 Call slower than p{_hedging_policy.percentile:.0f} ({delay:.1f}s) - sending hedge request")
+    hedge = _hedge_executor.submit(_call_remote, client, variant_prompt, deadline_at, priority, seed)
+    pending = {primary, hedge}
+    error: Optional[BaseException] = None
+    while pending:
+        done, pending = wait(pending, timeout=_remaining(deadline_at), return_when=FIRST_COMPLETED)
+        if not done:
+            raise DeadlineExceeded("deadline exceeded waiting for FIBO response")
+        for future in done:
+            if future.exception() is None:
+                if future is hedge:
+                    _hedging_policy.record_hedge_win()
+                # The losing call cannot be interrupted; its result is ignored
+                for other in pending:
+                    other.cancel()
+                return future.result()
+            error = future.exception()
+    raise error
 
 
-def _load_pipeline():
-    """
-    Initialize and return the module-level Hugging Face InferenceClient.
-    Returns None when HF_TOKEN is not set.
+def _generate_single_variant(
+    client,
+    compiled: CompiledPrompt,
+    variant_num: int,
+    seed: int,
+    hedge: bool = False,
+    deadline_at: Optional[float] = None,
+    priority: str = "interactive"
+) -> Dict[str, Any]:
     """
-    global _remote_client
-    if _remote_client is not None:
-        logger.info("✅ Using existing remote client")
-        return _remote_client
+    Generate one variant through the remote client.
 
-    if not HF_TOKEN:
-        logger.error("❌ No HF_TOKEN found. Set HF_TOKEN to your Hugging Face token.")
-        return None
+    Args:
+        client: Remote client pool (see _load_pipeline)
+        compiled: Compiled governed prompt
+        variant_num: Variant number (1-indexed)
+        seed: Seed sent with the request
+        hedge: Send a duplicate request if the call is unusually slow
+        deadline_at: Absolute time (time.time()) after which the call is abandoned
+        priority: Rate scheduler priority class ("interactive" or "batch")
+
+    Returns:
+        Outcome dictionary (see _make_outcome)
+    """
+    start = time.time()
+    if not _circuit_breaker.allow_request():
+        logger.warning(f"⚡ Circuit open - skipping remote call for variant {variant_num}")
+        return _make_outcome(variant_num, "failed", timings=_make_timings(total=time.time() - start))
 
     try:
-        logger.info("🔄 Initializing HuggingFace InferenceClient for briaai/FIBO...")
-        _remote_client = InferenceClient("briaai/FIBO", token=HF_TOKEN)
-        logger.info("✅ Remote InferenceClient initialized successfully")
-        return _remote_client
-    except Exception as e:
-        logger.error(f"❌ Failed to initialize remote InferenceClient: {e}")
-        logger.error(f"Error type: {type(e).__name__}")
-        _remote_client = None
-        return None
+        # Exact variant prompt, with its creative additions
+        variant_prompt = compiled.variant_prompt(variant_num)
+        logger.info(f"🎨 Variant {variant_num} prompt: {variant_prompt[:150]}{'...' if len(variant_prompt) > 150 else ''}")
+        logger.info(f"🎲 Using seed: {seed}")
 
+        # Log API call attempt
+        logger.info(f"📡 Making API call to HuggingFace for variant {variant_num}...")
 
-def is_pipeline_loaded() -> bool:
-    """Return True when the remote InferenceClient is available."""
-    return _load_pipeline() is not None
+        # The InferenceClient text_to_image can return PIL.Image or bytes
+        if hedge:
+            response, timings = _call_remote_hedged(client, variant_prompt, deadline_at, priority, seed)
+        else:
+            response, timings = _call_remote(client, variant_prompt, deadline_at, priority, seed)
+        latency = time.time() - start
 
+        logger.info(f"📡 API Response received in {latency:.2f}s")
+        logger.info(f"📡 Response type: {type(response)}")
 
-def is_remote_enabled() -> bool:
-    """Return True when remote FIBO generation is properly configured."""
-    return bool(hf_token) and is_pipeline_loaded()
+        # Use helper to handle different response types
+        decode_start = time.time()
+        image = _to_lazy_image(response)
+        timings["decode"] = time.time() - decode_start
+        timings["total"] = time.time() - start
+        _circuit_breaker.record_success()
+        logger.info(f"✅ Remote FIBO variant {variant_num} generated successfully - Size: {image.size}")
+        return _make_outcome(variant_num, "success", image, timings)
 
+    except DeadlineExceeded as e:
+        # Running out of budget says nothing about endpoint health
+        _circuit_breaker.release_probe()
+        logger.warning(f"⏰ Variant {variant_num} abandoned: {e}")
+        return _make_outcome(variant_num, "deadline_exceeded", timings=_make_timings(total=time.time() - start))
 
-def get_client_status() -> dict:
-    """Get detailed client status for UI display."""
-    client = _load_pipeline()
-    return {
-        "remote_available": client is not None,
-        "token_configured": bool(hf_token),
-        "mode": "remote" if client is not None else "safe_mode",
-        "model": "briaai/FIBO" if client is not None else "placeholder"
-    }
+    except Exception as e:
+        _circuit_breaker.record_failure()
+        _log_remote_error(e, variant_num)
+        return _make_outcome(variant_num, "failed", timings=_make_timings(total=time.time() - start))
 
 
-def generate_variant_prompt(base_prompt: str, variant_num: int) -> str:
+def _cached_variants(
+    compiled: CompiledPrompt,
+    variant_seeds: Dict[int, int],
+    use_cache: bool
+) -> Dict[int, Dict[str, Any]]:
     """
-    Generate a slightly adjusted version of the prompt by adding creative flavor words.
-    
+    Look up already generated variants in the generation cache.
+
     Args:
-        base_prompt: The original prompt text
-        variant_num: Variant number (1-indexed)
-        
+        compiled: Compiled governed prompt
+        variant_seeds: Seed of every variant to look up, by variant number
+        use_cache: Whether the cache is used at all
+
     Returns:
-        Modified prompt with added creative elements
+        Mapping of variant number to outcome dictionary for every cache hit
     """
-    # Creative variations to add diversity
-    lighting_variations = [
-        "golden sunset lighting", "dramatic shadows", "soft natural light", 
-        "cinematic lighting", "warm ambient glow", "bright studio lighting"
-    ]
-    
-    angle_variations = [
-        "close-up portrait", "wide-angle view", "low angle shot", 
-        "bird's eye view", "three-quarter angle", "dynamic perspective"
-    ]
-    
-    mood_variations = [
-        "elegant atmosphere", "vibrant energy", "serene ambiance", 
-        "dynamic composition", "minimalist aesthetic", "rich textures"
-    ]
-    
-    # Rotate through different types of variations based on variant number
-    if variant_num % 3 == 1:
-        flavor = lighting_variations[(variant_num - 1) % len(lighting_variations)]
-    elif variant_num % 3 == 2:
-        flavor = angle_variations[(variant_num - 1) % len(angle_variations)]
-    else:
-        flavor = mood_variations[(variant_num - 1) % len(mood_variations)]
-    
-    # Add the flavor to the end of the prompt
-    return f"{base_prompt}, {flavor}"
+    if not use_cache:
+        return {}
+    cache = get_generation_cache()
+    hits: Dict[int, Dict[str, Any]] = {}
+    for n, seed in variant_seeds.items():
+        lookup_start = time.time()
+        image = cache.get(make_cache_key(compiled.variant_prompt(n), seed))
+        if image is not None:
+            lookup_time = time.time() - lookup_start
+            hits[n] = _make_outcome(n, "success", image, _make_timings(decode=lookup_time, total=lookup_time))
+    if hits:
+        logger.info(f"💾 Cache hit for variants {sorted(hits)}")
+    return hits
+
+
+def _cut_short_for_waiter(outcome: Dict[str, Any], deadline_at: Optional[float]) -> bool:
+    """True when a shared call ran out of its leader's budget but the waiter still has time."""
+    return outcome["status"] == "deadline_exceeded" and (deadline_at is None or time.time() < deadline_at)
 
 
-def build_prompt_from_governed_json(governed_json: Dict[str, Any]) -> str:
+def _generate_shared_variant(
+    client,
+    compiled: CompiledPrompt,
+    variant_num: int,
+    seed: int,
+    use_cache: bool,
+    hedge: bool = False,
+    deadline_at: Optional[float] = None,
+    priority: str = "interactive"
+) -> Dict[str, Any]:
     """
-    Convert JSON prompt structure to string format for FIBO API.
-    
-    Args:
-        governed_json: Structured JSON prompt
-        
+    Generate one variant, sharing the remote call with identical
+    in-flight requests and storing the result in the cache.
+
     Returns:
-        String representation of the prompt
+        Outcome dictionary; total includes time spent waiting on a shared call
     """
-    if isinstance(governed_json, str):
-        try:
-            governed_json = json.loads(governed_json)
-        except Exception:
-            return governed_json
+    start = time.time()
+    key = make_cache_key(compiled.variant_prompt(variant_num), seed)
+
+    def leader() -> Dict[str, Any]:
+        outcome = _generate_single_variant(
+            client, compiled, variant_num, seed, hedge=hedge, deadline_at=deadline_at, priority=priority
+        )
+        if outcome["image"] is not None and use_cache:
+            get_generation_cache().put(key, outcome["image"])
+        return outcome
+
+    outcome = _single_flight.do(key, leader, retry_if=lambda shared: _cut_short_for_waiter(shared, deadline_at))
+    return dict(outcome, timings=dict(outcome["timings"], total=time.time() - start))
+
 
-    parts = []
+async def _generate_shared_variant_async(
+    compiled: CompiledPrompt,
+    variant_num: int,
+    seed: int,
+    use_cache: bool,
+    hedge: bool = False,
+    deadline_at: Optional[float] = None,
+    priority: str = "interactive"
+) -> Dict[str, Any]:
+    """Awaitable counterpart of _generate_shared_variant."""
+    start = time.time()
+    key = make_cache_key(compiled.variant_prompt(variant_num), seed)
 
-    scene = governed_json.get("scene")
-    if scene:
-        parts.append(str(scene))
+    async def leader() -> Dict[str, Any]:
+        outcome = await _generate_single_variant_async(
+            compiled, variant_num, seed, hedge=hedge, deadline_at=deadline_at, priority=priority
+        )
+        if outcome["image"] is not None and use_cache:
+            await asyncio.to_thread(get_generation_cache().put, key, outcome["image"])
+        return outcome
 
-    style = governed_json.get("style")
-    if style:
-        parts.append(f"style: {style}")
+    outcome = await _single_flight.do_async(
+        key, leader, retry_if=lambda shared: _cut_short_for_waiter(shared, deadline_at)
+    )
+    return dict(outcome, timings=dict(outcome["timings"], total=time.time() - start))
 
-    modifiers = governed_json.get("modifiers") or governed_json.get("modifiers_list")
-    if isinstance(modifiers, list):
-        parts.append("modifiers: " + ", ".join(str(m) for m in modifiers))
 
-    mood = governed_json.get("mood")
-    if mood:
-        parts.append(f"mood: {mood}")
+def plan_seeds(
+    json_prompt: Union[dict, CompiledPrompt],
+    num_variants: int,
+    seeds: Optional[List[int]] = None,
+    deterministic: bool = True
+) -> List[int]:
+    """
+    Decide the seed of every variant of a request.
+
+    Args:
+        json_prompt: Governed JSON prompt or compiled prompt
+        num_variants: Number of variants
+        seeds: Explicit seeds (seeds[0] for variant 1), e.g. taken from
+            the audit log to regenerate an earlier request; overrides the plan
+        deterministic: Derive seeds from the prompt hash (see
+            prompt_compiler.VariantPlanner.seed) instead of drawing random ones
+
+    Returns:
+        One seed per variant
 
-    colors = governed_json.get("colors")
-    if isinstance(colors, list):
-        parts.append("colors: " + ", ".join(str(c) for c in colors))
+    Raises:
+        ValueError: If fewer explicit seeds than variants are given
+    """
+    if seeds is not None:
+        if len(seeds) < num_variants:
+            raise ValueError(f"{num_variants} variants requested but only {len(seeds)} seeds given")
+        return [int(seed) for seed in seeds[:num_variants]]
+    if not deterministic:
+        return [random.randint(0, 9999999) for _ in range(num_variants)]
+    planner = compile_prompt(json_prompt).planner
+    return [planner.seed(n) for n in range(1, num_variants + 1)]
 
-    if not parts:
-        return json.dumps(governed_json)
 
-    return " | ".join(parts)
+def _warn_repeated_variants(num_images: int):
+    """Log when a request asks for more variants than there are distinct flavor combinations."""
+    if num_images > MAX_DISTINCT_VARIANTS:
+        logger.warning(
+            f"⚠️ {num_images} variants requested but only {MAX_DISTINCT_VARIANTS} distinct "
+            f"flavor combinations exist - variants past that repeat earlier ones"
+        )
 
 
-def generate_images_from_json_prompt(json_prompt: dict, num_images: int = 1) -> List[Image.Image]:
+def iter_images_from_json_prompt(
+    json_prompt: Union[dict, CompiledPrompt],
+    num_images: int = 1,
+    concurrent: bool = True,
+    use_cache: bool = True,
+    hedge: bool = False,
+    deadline: Optional[float] = None,
+    priority: str = "interactive",
+    seeds: Optional[List[int]] = None
+) -> Iterator[Dict[str, Any]]:
     """
-    Ensure the remote client is loaded; if not, return an empty list.
+    Generate variants and yield each one as soon as it completes.
 
-    Convert the structured JSON prompt into a string payload using
-    json.dumps(json_prompt, ensure_ascii=False), call the remote client
-    using text_to_image in a loop, and return a list of PIL.Image objects.
-    
-    Each variant gets a unique seed and slight prompt variations for diversity.
+    Compile the structured JSON prompt into its canonical string payload
+    (see prompt_compiler.compile_prompt) and call the remote client using
+    text_to_image for every variant.
 
-    On any exception, log and return an empty list.
+    Variants already present in the generation cache are served from it
+    first; use_cache=False bypasses the cache for both lookup and storage.
+    Identical variants already being generated for another session are
+    not requested twice; the caller waits for the in-flight result.
+
+    With concurrent=True the variants are fanned out over a thread pool;
+    the number of text_to_image calls in flight across the whole process
+    is set by the adaptive concurrency limiter (at most
+    FIBO_MAX_CONCURRENT_REQUESTS).
+
+    With hedge=True a variant whose call is slower than the recent latency
+    percentile (FIBO_HEDGE_PERCENTILE) gets a duplicate request, subject to
+    the hedge budget, and the first successful response wins.
+
+    deadline is a time budget in seconds for the whole request. Concurrent
+    variants share it; sequential variants each get an equal share of what
+    is left. Calls still running when it runs out are abandoned and their
+    variants yielded with status "deadline_exceeded".
+
+    priority is the rate scheduler class: "interactive" calls are always
+    sent before waiting "batch" calls.
+
+    seeds gives the seed of each variant (seeds[0] for variant 1); by
+    default the prompt's deterministic seed plan is used. The seed is sent
+    with the request and is part of the cache key, so repeating a request
+    with the same seeds is served from the cache.
+
+    Each variant gets a distinct lighting, angle and mood combination from
+    the prompt's variant plan (see prompt_compiler.VariantPlanner); plans
+    only repeat past MAX_DISTINCT_VARIANTS variants.
+
+    Yields:
+        Outcome dictionaries with variant_id, status ("success", "failed"
+        or "deadline_exceeded"), image and timings (queue_wait,
+        remote_call, decode and total seconds), in completion order
     """
+    get_settings()
     logger.info(f"🎯 Starting image generation: {num_images} variants requested")
-    
-    client = _load_pipeline()
-    if client is None:
+    _request_scheduler._check_priority(priority)
+    deadline_at = time.time() + deadline if deadline is not None else None
+    compiled = compile_prompt(json_prompt)
+    _warn_repeated_variants(num_images)
+    variant_seeds = dict(enumerate(plan_seeds(compiled, num_images, seeds), start=1))
+
+    variant_nums = list(variant_seeds)
+    cached = _cached_variants(compiled, variant_seeds, use_cache)
+    for n in variant_nums:
+        if n in cached:
+            yield cached[n]
+    pending = [n for n in variant_nums if n not in cached]
+
+    if pending and _circuit_breaker.reject_if_open(len(pending)):
+        logger.warning("⚡ FIBO circuit open - skipping remote generation")
+        pending, skipped = [], pending
+        for n in skipped:
+            yield _make_outcome(n, "failed")
+
+    client = _load_pipeline() if pending else None
+    if pending and client is None:
         logger.error("❌ Remote FIBO client not available (HF_TOKEN missing or init failed)")
-        return []
+        for n in pending:
+            yield _make_outcome(n, "failed")
+        return
+    if not pending:
+        return
 
-    base_prompt_str = json.dumps(json_prompt, ensure_ascii=False)
+    base_prompt_str = compiled.payload
     logger.info(f"📝 Base prompt: {base_prompt_str[:100]}{'...' if len(base_prompt_str) > 100 else ''}")
-    
-    images: List[Image.Image] = []
 
-    for i in range(num_images):
+    sequential = not concurrent or len(pending) == 1
+    if deadline_at is None and sequential:
+        for n in pending:
+            yield _generate_shared_variant(client, compiled, n, variant_seeds[n], use_cache, hedge, priority=priority)
+        return
+
+    # Sequential variants still get one worker each so an abandoned call
+    # does not hold up the next variant
+    workers = len(pending) if sequential else min(len(pending), get_settings().max_concurrent_requests)
+    logger.info(f"⚡ Generating variants with {workers} workers")
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fibo-variant")
+    try:
+        if sequential:
+            # Split what is left of the budget evenly over the remaining variants
+            for index, n in enumerate(pending):
+                variant_start = time.time()
+                variant_deadline_at = variant_start + _remaining(deadline_at) / (len(pending) - index)
+                future = executor.submit(
+                    _generate_shared_variant,
+                    client, compiled, n, variant_seeds[n], use_cache, hedge, variant_deadline_at, priority
+                )
+                if wait([future], timeout=_remaining(variant_deadline_at)).done:
+                    yield future.result()
+                else:
+                    logger.warning(f"⏰ Variant {n} exceeded its share of the deadline - abandoning")
+                    yield _make_outcome(n, "deadline_exceeded", timings=_make_timings(total=time.time() - variant_start))
+            return
+
+        start = time.time()
+        futures = {
+            executor.submit(
+                _generate_shared_variant, client, compiled, n, variant_seeds[n], use_cache, hedge, deadline_at, priority
+            ): n
+            for n in pending
+        }
         try:
-            start = time.time()
-            
-            # Generate unique seed for this variant
-            unique_seed = random.randint(0, 9999999)
-            
-            # Create variant prompt with creative additions
-            variant_prompt = generate_variant_prompt(base_prompt_str, i + 1)
-            logger.info(f"🎨 Variant {i+1} prompt: {variant_prompt[:150]}{'...' if len(variant_prompt) > 150 else ''}")
-            logger.info(f"🎲 Using seed: {unique_seed}")
-            
-            # Log API call attempt
-            logger.info(f"📡 Making API call to HuggingFace for variant {i+1}...")
-            
-            # The InferenceClient text_to_image can return PIL.Image or bytes
-            # Note: HuggingFace Inference API doesn't support seed parameter directly
-            # but we'll use the varied prompts to create diversity
-            response = client.text_to_image(prompt=variant_prompt)
-            latency = time.time() - start
-            
-            logger.info(f"📡 API Response received in {latency:.2f}s")
-            logger.info(f"📡 Response type: {type(response)}")
-            
-            # Use helper to handle different response types
-            image = _to_pil_image(response)
-            images.append(image)
-            logger.info(f"✅ Remote FIBO variant {i+1} generated successfully - Size: {image.size}")
-            
-        except Exception as e:
-            logger.error(f"❌ Remote generation error for variant {i+1}: {e}")
-            logger.error(f"❌ Error type: {type(e).__name__}")
-            
-            # Log detailed error information
-            if hasattr(e, 'response'):
-                status_code = getattr(e.response, 'status_code', 'unknown')
-                logger.error(f"❌ HTTP Status: {status_code}")
-                
-                # Try to get response text if available
-                try:
-                    response_text = getattr(e.response, 'text', 'No response text')
-                    logger.error(f"❌ Response text: {response_text}")
-                except:
-                    logger.error("❌ Could not get response text")
-                    
-            if hasattr(e, 'message'):
-                logger.error(f"❌ Error message: {e.message}")
-                
-            # Continue with other variants instead of returning empty list
-            continue
+            for future in as_completed(futures, timeout=_remaining(deadline_at)):
+                yield future.result()
+        except TimeoutError:
+            unfinished = sorted(n for future, n in futures.items() if not future.done())
+            logger.warning(f"⏰ Deadline of {deadline:.1f}s exceeded - abandoning variants {unfinished}")
+            for n in unfinished:
+                yield _make_outcome(n, "deadline_exceeded", timings=_make_timings(total=time.time() - start))
+    finally:
+        # If the consumer stops early or the deadline passed, drop variants
+        # that have not started yet; calls already running are ignored
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def generate_images_from_json_prompt(
+    json_prompt: Union[dict, CompiledPrompt],
+    num_images: int = 1,
+    concurrent: bool = True,
+    use_cache: bool = True,
+    hedge: bool = False,
+    deadline: Optional[float] = None,
+    priority: str = "interactive",
+    seeds: Optional[List[int]] = None
+) -> List[LazyImage]:
+    """
+    Generate variants and return a list of LazyImage objects in variant order.
+
+    See iter_images_from_json_prompt for how variants are generated. When
+    the remote client is not loaded only cached variants are returned
+    (usually an empty list). Failed or abandoned variants are logged and
+    skipped; the remaining variants are still returned.
+    """
+    outcomes = sorted(
+        iter_images_from_json_prompt(
+            json_prompt, num_images, concurrent=concurrent, use_cache=use_cache, hedge=hedge,
+            deadline=deadline, priority=priority, seeds=seeds
+        ),
+        key=lambda outcome: outcome["variant_id"]
+    )
+    images: List[LazyImage] = [outcome["image"] for outcome in outcomes if outcome["image"] is not None]
 
     logger.info(f"🏁 Generation complete: {len(images)}/{num_images} images successfully generated")
     return images
 
 
-def _create_safe_mode_image(json_prompt: dict, variant_id: int = 1) -> Image.Image:
+async def _call_remote_async(
+    async_client,
+    client,
+    variant_prompt: str,
+    priority: str = "interactive",
+    seed: Optional[int] = None,
+    started: Optional[asyncio.Event] = None
+) -> Tuple[Any, Dict[str, float]]:
+    """Awaitable counterpart of _call_remote."""
+    limiter, hedging_policy = _concurrency_limiter, _hedging_policy
+    queue_start = time.time()
+    await _request_scheduler.acquire_async(priority)
+    await limiter.acquire_async(priority)
+    if started is not None:
+        started.set()
+    call_start = time.time()
+    try:
+        if async_client is not None:
+            response = await async_client.text_to_image(prompt=variant_prompt, seed=seed)
+        else:
+            response = await asyncio.to_thread(client.text_to_image, prompt=variant_prompt, seed=seed)
+    except Exception as e:
+        limiter.record_failure(_extract_status_code(e))
+        raise
+    finally:
+        limiter.release()
+    latency = time.time() - call_start
+    limiter.record_success(latency)
+    hedging_policy.record_latency(latency)
+    return response, _make_timings(queue_wait=call_start - queue_start, remote_call=latency)
+
+
+async def _call_remote_hedged_async(
+    async_client,
+    client,
+    variant_prompt: str,
+    deadline_at: Optional[float] = None,
+    priority: str = "interactive",
+    seed: Optional[int] = None
+) -> Tuple[Any, Dict[str, float]]:
     """
-    Create a safe mode informational image when remote generation fails.
-    
+    Awaitable counterpart of _call_remote_hedged; the losing call is cancelled.
+    The overall deadline is enforced by the caller through task cancellation.
+    """
+    started = asyncio.Event()
+    primary = asyncio.ensure_future(_call_remote_async(async_client, client, variant_prompt, priority, seed, started))
+    primary.add_done_callback(lambda _: started.set())
+    delay = _hedging_policy.hedge_delay()
+    try:
+        if delay is not None:
+            # The hedge delay counts from when the primary gets its call slot
+            await started.wait()
+            remaining = _remaining(deadline_at)
+            if remaining is not None and remaining <= delay:
+                delay = None
+        if delay is not None:
+            await asyncio.wait({primary}, timeout=delay)
+        if delay is None or primary.done() or not _hedging_policy.try_spend():
+            return await primary
+    except asyncio.CancelledError:
+        primary.cancel()
+        raise
+
+    logger.info(f"🏇 Call slower than p{_hedging_policy.percentile:.0f} ({delay:.1f}s) - sending hedge request")
+    hedge = asyncio.ensure_future(_call_remote_async(async_client, client, variant_prompt, priority, seed))
+    pending = {primary, hedge}
+    error: Optional[BaseException] = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        _hedging_policy.record_hedge_win()
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def _generate_single_variant_async(
+    compiled: CompiledPrompt,
+    variant_num: int,
+    seed: int,
+    hedge: bool = False,
+    deadline_at: Optional[float] = None,
+    priority: str = "interactive"
+) -> Dict[str, Any]:
+    """
+    Awaitable counterpart of _generate_single_variant.
+
+    Uses the AsyncInferenceClient when available, otherwise runs the sync
+    client in a worker thread so the event loop is never blocked.
+
     Args:
-        json_prompt: The original JSON prompt
-        variant_id: Variant number for display
-        
+        compiled: Compiled governed prompt
+        variant_num: Variant number (1-indexed)
+        seed: Seed sent with the request
+        hedge: Send a duplicate request if the call is unusually slow
+        deadline_at: Absolute request deadline, used to skip pointless hedges
+        priority: Rate scheduler priority class ("interactive" or "batch")
+
     Returns:
-        PIL Image with safe mode information
+        Outcome dictionary (see _make_outcome)
     """
-    img = Image.new('RGB', (512, 320), color=(45, 55, 72))
-    
+    start = time.time()
+    if not _circuit_breaker.allow_request():
+        logger.warning(f"⚡ Circuit open - skipping remote call for variant {variant_num}")
+        return _make_outcome(variant_num, "failed", timings=_make_timings(total=time.time() - start))
+
     try:
-        from PIL import ImageDraw, ImageFont
-        draw = ImageDraw.Draw(img)
-        
-        # Get prompt text for preview
-        prompt_text = build_prompt_from_governed_json(json_prompt)
-        prompt_preview = prompt_text[:50] + "..." if len(prompt_text) > 50 else prompt_text
-        
-        # Try to load fonts
+        variant_prompt = compiled.variant_prompt(variant_num)
+        logger.info(f"🎨 Variant {variant_num} prompt: {variant_prompt[:150]}{'...' if len(variant_prompt) > 150 else ''}")
+        logger.info(f"🎲 Using seed: {seed}")
+        logger.info(f"📡 Making async API call to HuggingFace for variant {variant_num}...")
+
+        async_client = _load_async_pipeline()
+        client = None if async_client is not None else _load_pipeline()
+        if async_client is None and client is None:
+            raise RuntimeError("Remote FIBO client not available")
+
+        if hedge:
+            response, timings = await _call_remote_hedged_async(
+                async_client, client, variant_prompt, deadline_at, priority, seed
+            )
+        else:
+            response, timings = await _call_remote_async(async_client, client, variant_prompt, priority, seed)
+        latency = time.time() - start
+
+        logger.info(f"📡 Async API Response received in {latency:.2f}s")
+
+        decode_start = time.time()
+        image = _to_lazy_image(response)
+        timings["decode"] = time.time() - decode_start
+        timings["total"] = time.time() - start
+        _circuit_breaker.record_success()
+        logger.info(f"✅ Remote FIBO variant {variant_num} generated successfully - Size: {image.size}")
+        return _make_outcome(variant_num, "success", image, timings)
+
+    except asyncio.CancelledError:
+        # Abandoned at the request deadline; says nothing about endpoint health
+        _circuit_breaker.release_probe()
+        raise
+
+    except Exception as e:
+        _circuit_breaker.record_failure()
+        _log_remote_error(e, variant_num)
+        return _make_outcome(variant_num, "failed", timings=_make_timings(total=time.time() - start))
+
+
+async def aiter_images_from_json_prompt(
+    json_prompt: Union[dict, CompiledPrompt],
+    num_images: int = 1,
+    use_cache: bool = True,
+    hedge: bool = False,
+    deadline: Optional[float] = None,
+    priority: str = "interactive",
+    seeds: Optional[List[int]] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Async version of iter_images_from_json_prompt.
+
+    All variants are awaited concurrently on the running event loop, so a
+    single loop can multiplex many outstanding FIBO calls; remote calls
+    queue on the same adaptive concurrency limiter as the sync path. When
+    the deadline passes, unfinished calls are cancelled.
+
+    Yields:
+        Outcome dictionaries (see iter_images_from_json_prompt) in
+        completion order
+    """
+    get_settings()
+    logger.info(f"🎯 Starting async image generation: {num_images} variants requested")
+    _request_scheduler._check_priority(priority)
+    start = time.time()
+    deadline_at = start + deadline if deadline is not None else None
+    compiled = compile_prompt(json_prompt)
+    _warn_repeated_variants(num_images)
+    variant_seeds = dict(enumerate(plan_seeds(compiled, num_images, seeds), start=1))
+
+    variant_nums = list(variant_seeds)
+    cached = await asyncio.to_thread(_cached_variants, compiled, variant_seeds, use_cache)
+    for n in variant_nums:
+        if n in cached:
+            yield cached[n]
+    pending = [n for n in variant_nums if n not in cached]
+
+    remote_configured = get_settings().remote_configured
+    if pending and (not remote_configured or _circuit_breaker.reject_if_open(len(pending))):
+        if remote_configured:
+            logger.warning("⚡ FIBO circuit open - skipping remote generation")
+        else:
+            logger.error("❌ Remote FIBO client not available (HF_TOKEN missing or init failed)")
+        for n in pending:
+            yield _make_outcome(n, "failed")
+        return
+    if not pending:
+        return
+
+    tasks = {
+        asyncio.ensure_future(
+            _generate_shared_variant_async(compiled, n, variant_seeds[n], use_cache, hedge, deadline_at, priority)
+        ): n
+        for n in pending
+    }
+    try:
+        for next_done in asyncio.as_completed(tasks, timeout=_remaining(deadline_at)):
+            yield await next_done
+    except asyncio.TimeoutError:
+        unfinished = sorted(n for task, n in tasks.items() if not task.done())
+        logger.warning(f"⏰ Deadline of {deadline:.1f}s exceeded - cancelling variants {unfinished}")
+        for n in unfinished:
+            yield _make_outcome(n, "deadline_exceeded", timings=_make_timings(total=time.time() - start))
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def generate_images_from_json_prompt_async(
+    json_prompt: Union[dict, CompiledPrompt],
+    num_images: int = 1,
+    use_cache: bool = True,
+    hedge: bool = False,
+    deadline: Optional[float] = None,
+    priority: str = "interactive",
+    seeds: Optional[List[int]] = None
+) -> List[LazyImage]:
+    """
+    Async version of generate_images_from_json_prompt.
+
+    Images are returned in variant order; failed or abandoned variants are
+    logged and skipped.
+    """
+    outcomes = [
+        outcome async for outcome in aiter_images_from_json_prompt(
+            json_prompt, num_images, use_cache=use_cache, hedge=hedge, deadline=deadline, priority=priority,
+            seeds=seeds
+        )
+    ]
+    outcomes.sort(key=lambda outcome: outcome["variant_id"])
+    images: List[LazyImage] = [outcome["image"] for outcome in outcomes if outcome["image"] is not None]
+
+    logger.info(f"🏁 Async generation complete: {len(images)}/{num_images} images successfully generated")
+    return images
+
+
+SAFE_MODE_IMAGE_SIZE = (512, 320)
+_safe_mode_layer: Optional[Tuple["Image.Image", Any]] = None
+_safe_mode_layer_lock = threading.Lock()
+
+
+def _safe_mode_background() -> Tuple["Image.Image", Any]:
+    """
+    Render the static part of the safe mode image and load its font, once.
+
+    Returns:
+        (background image, font for the per-variant text); the font is
+        None if text cannot be drawn
+    """
+    global _safe_mode_layer
+    with _safe_mode_layer_lock:
+        if _safe_mode_layer is not None:
+            return _safe_mode_layer
+
+        from PIL import Image
+        img = Image.new('RGB', SAFE_MODE_IMAGE_SIZE, color=(45, 55, 72))
+        font_small = None
         try:
-            font_large = ImageFont.truetype("arial.ttf", 20)
-            font_small = ImageFont.truetype("arial.ttf", 14)
-        except:
-            font_large = ImageFont.load_default()
-            font_small = ImageFont.load_default()
-        
-        # Draw informational text
-        draw.text((256, 70), "FIBO SAFE MODE", font=font_large, anchor="mm", fill=(255, 255, 255))
-        draw.text((256, 100), "Requires CUDA-compatible GPU", font=font_small, anchor="mm", fill=(200, 200, 200))
-        draw.text((256, 125), "or valid HF token", font=font_small, anchor="mm", fill=(200, 200, 200))
-        
-        draw.text((256, 160), "Prompt:", font=font_small, anchor="mm", fill=(255, 255, 255))
+            from PIL import ImageDraw, ImageFont
+            draw = ImageDraw.Draw(img)
+
+            # Try to load fonts
+            try:
+                font_large = ImageFont.truetype("arial.ttf", 20)
+                font_small = ImageFont.truetype("arial.ttf", 14)
+            except OSError:
+                font_large = ImageFont.load_default()
+                font_small = ImageFont.load_default()
+
+            # Draw informational text
+            draw.text((256, 70), "FIBO SAFE MODE", font=font_large, anchor="mm", fill=(255, 255, 255))
+            draw.text((256, 100), "Requires CUDA-compatible GPU", font=font_small, anchor="mm", fill=(200, 200, 200))
+            draw.text((256, 125), "or valid HF token", font=font_small, anchor="mm", fill=(200, 200, 200))
+            draw.text((256, 160), "Prompt:", font=font_small, anchor="mm", fill=(255, 255, 255))
+
+        except Exception as e:
+            print(f"Warning: Could not add text to safe mode image: {e}")
+            font_small = None
+
+        _safe_mode_layer = (img, font_small)
+        return _safe_mode_layer
+
+
+def _safe_mode_prompt_preview(json_prompt: Union[dict, CompiledPrompt]) -> str:
+    """Prompt text shown on the safe mode image."""
+    prompt_text = compile_prompt(json_prompt).display
+    return prompt_text[:50] + "..." if len(prompt_text) > 50 else prompt_text
+
+
+def _render_safe_mode_image(prompt_preview: str, variant_id: int) -> "Image.Image":
+    """Overlay the per-variant text on a copy of the safe mode background."""
+    background, font_small = _safe_mode_background()
+    img = background.copy()
+    if font_small is None:
+        return img
+
+    try:
+        from PIL import ImageDraw
+        draw = ImageDraw.Draw(img)
         draw.text((256, 185), prompt_preview, font=font_small, anchor="mm", fill=(180, 220, 180))
-        
         draw.text((256, 220), f"Variant {variant_id}", font=font_small, anchor="mm", fill=(255, 180, 180))
-        
     except Exception as e:
         print(f"Warning: Could not add text to safe mode image: {e}")
-    
+
     return img
 
 
+@functools.lru_cache(maxsize=256)
+def _encoded_safe_mode_image(prompt_preview: str, variant_id: int) -> LazyImage:
+    """PNG-encoded safe mode image, cached per (prompt preview, variant)."""
+    return LazyImage.from_pil(_render_safe_mode_image(prompt_preview, variant_id))
+
+
+def _safe_mode_image(json_prompt: Union[dict, CompiledPrompt], variant_id: int = 1) -> LazyImage:
+    """
+    Return the encoded safe mode image shown for a variant when remote generation fails.
+
+    Repeated failures for the same prompt reuse the cached PNG bytes
+    instead of drawing and encoding again.
+    """
+    return _encoded_safe_mode_image(_safe_mode_prompt_preview(json_prompt), variant_id)
+
+
 class FIBOClient:
     """Remote Bria FIBO client using HuggingFace Inference API."""
     
@@ -329,92 +2115,318 @@ class FIBOClient:
         Args:
             hf_token: Hugging Face token (defaults to HF_TOKEN env var)
         """
-        self.hf_token = hf_token or os.getenv("HF_TOKEN", "") or os.getenv("HUGGINGFACE_TOKEN", "")
+        self.hf_token = hf_token or get_settings().hf_token or ""
         self.model_id = "briaai/FIBO"
     
     def generate_images(
         self, 
         prompt: Dict, 
         num_variants: int = 2,
+        concurrent: bool = True,
+        use_cache: bool = True,
+        hedge: bool = False,
+        deadline: Optional[float] = None,
+        priority: str = "interactive",
+        seeds: Optional[List[int]] = None,
+        deterministic_seeds: bool = True,
         **kwargs  # Accept additional parameters for compatibility
     ) -> List[Dict]:
         """
         Generate images using remote FIBO API and return in app-compatible format.
-        Each variant gets unique seeds and creative prompt variations.
+        Each variant gets its own seed and creative prompt variation.
         
         This method maintains compatibility with the existing app.py interface.
         
         Args:
             prompt: JSON-structured prompt
             num_variants: Number of image variants to generate
+            concurrent: Generate variants in parallel instead of one by one
+            use_cache: Serve and store variants through the generation cache
+            hedge: Send duplicate requests for unusually slow variants
+            deadline: Time budget in seconds for the whole request (None waits indefinitely)
+            priority: Rate scheduler class, "interactive" or "batch"
+            seeds: Seed of each variant, e.g. from an audit log entry (overrides the seed plan)
+            deterministic_seeds: Derive seeds from the prompt hash; False draws random seeds
             **kwargs: Additional parameters (ignored for remote API)
             
         Returns:
-            List of image result dictionaries with PIL Images
+            List of image result dictionaries with LazyImages, in variant order
+        """
+        results = sorted(
+            self.iter_generate_images(
+                prompt, num_variants, concurrent=concurrent, use_cache=use_cache, hedge=hedge,
+                deadline=deadline, priority=priority, seeds=seeds, deterministic_seeds=deterministic_seeds
+            ),
+            key=lambda r: r["variant_id"]
+        )
+        logger.info(f"🏁 generate_images returning {len(results)} results")
+        return results
+
+    def iter_generate_images(
+        self,
+        prompt: Dict,
+        num_variants: int = 2,
+        concurrent: bool = True,
+        use_cache: bool = True,
+        hedge: bool = False,
+        deadline: Optional[float] = None,
+        priority: str = "interactive",
+        seeds: Optional[List[int]] = None,
+        deterministic_seeds: bool = True,
+        **kwargs  # Accept additional parameters for compatibility
+    ) -> Iterator[Dict]:
+        """
+        Generate images and yield each result dictionary as soon as its
+        variant completes. Results have the same format as generate_images.
+
+        Failed variants are skipped. Variants abandoned at the deadline are
+        yielded with status "deadline_exceeded" and no image. If no variant
+        succeeds or times out, safe mode results are yielded for every
+        variant once generation has finished.
+
+        Args:
+            prompt: JSON-structured prompt
+            num_variants: Number of image variants to generate
+            concurrent: Generate variants in parallel instead of one by one
+            use_cache: Serve and store variants through the generation cache
+            hedge: Send duplicate requests for unusually slow variants
+            deadline: Time budget in seconds for the whole request (None waits indefinitely)
+            priority: Rate scheduler class, "interactive" or "batch"
+            seeds: Seed of each variant, e.g. from an audit log entry (overrides the seed plan)
+            deterministic_seeds: Derive seeds from the prompt hash; False draws random seeds
+            **kwargs: Additional parameters (ignored for remote API)
+
+        Yields:
+            Image result dictionaries in completion order
         """
         logger.info(f"🚀 FIBOClient.generate_images called with {num_variants} variants")
         logger.info(f"📝 Input prompt: {prompt}")
         
-        # Generate unique seeds for each variant upfront
-        variant_seeds = [random.randint(0, 9999999) for _ in range(num_variants)]
-        logger.info(f"🎲 Generated seeds: {variant_seeds}")
-        
-        # Call the new remote function
-        images = generate_images_from_json_prompt(prompt, num_variants)
+        # One seed plan, sent with every request and recorded in the results
+        compiled = compile_prompt(prompt)
+        variant_seeds = plan_seeds(compiled, num_variants, seeds, deterministic_seeds)
+        logger.info(f"🎲 Planned seeds: {variant_seeds}")
 
-        results: List[Dict[str, Any]] = []
+        produced = 0
+        for outcome in iter_images_from_json_prompt(
+            compiled, num_variants, concurrent=concurrent, use_cache=use_cache, hedge=hedge,
+            deadline=deadline, priority=priority, seeds=variant_seeds
+        ):
+            result = self._outcome_result(prompt, compiled, outcome, variant_seeds[outcome["variant_id"] - 1])
+            if result is None:
+                continue
+            produced += 1
+            yield result
 
-        if images:  # Remote generation successful
-            logger.info(f"✅ Remote generation successful: {len(images)} images")
-            for i, image in enumerate(images):
-                # Create variant prompt to show what was actually used
-                base_prompt_str = build_prompt_from_governed_json(prompt)
-                variant_prompt_str = generate_variant_prompt(base_prompt_str, i + 1)
-                
-                result = {
-                    "variant_id": i + 1,
-                    "status": "success",
-                    "image": image,
-                    "prompt_used": prompt,
-                    "prompt_string": variant_prompt_str,  # Show the actual variant prompt used
-                    "generation_time": 0.0,
-                    "metadata": {
-                        "model": self.model_id,
-                        "provider": "huggingface-inference",
-                        "seed": variant_seeds[i],  # Use the actual unique seed
-                        "device": "remote",
-                        "latency": None,
-                        "size": f"{image.size[0]}x{image.size[1]}" if hasattr(image, 'size') else "unknown",
-                        "variant_type": "creative_variation",
-                        "base_prompt": base_prompt_str
-                    }
-                }
-                results.append(result)
-                logger.info(f"📊 Variant {i+1} result created - Status: {result['status']}")
-        else:  # Remote generation failed, show safe mode
-            logger.warning(f"⚠️ Remote generation failed, falling back to safe mode for {num_variants} variants")
-            for i in range(num_variants):
-                safe_image = _create_safe_mode_image(prompt, i + 1)
-                result = {
-                    "variant_id": i + 1,
-                    "status": "safe_mode",
-                    "image": safe_image,
-                    "prompt_used": prompt,
-                    "prompt_string": build_prompt_from_governed_json(prompt),
-                    "generation_time": 0.1,
-                    "metadata": {
-                        "model": "safe_mode",
-                        "provider": "local-fallback",
-                        "seed": variant_seeds[i],  # Use unique seeds even in safe mode
-                        "device": "cpu",
-                        "size": f"{safe_image.size[0]}x{safe_image.size[1]}" if hasattr(safe_image, 'size') else "512x320",
-                        "variant_type": "safe_mode"
-                    }
-                }
-                results.append(result)
-                logger.info(f"📊 Safe mode variant {i+1} created")
+        if not produced:
+            yield from self._safe_mode_results(prompt, compiled, num_variants, variant_seeds)
 
-        logger.info(f"🏁 generate_images returning {len(results)} results")
+    async def generate_images_async(
+        self,
+        prompt: Dict,
+        num_variants: int = 2,
+        use_cache: bool = True,
+        hedge: bool = False,
+        deadline: Optional[float] = None,
+        priority: str = "interactive",
+        seeds: Optional[List[int]] = None,
+        deterministic_seeds: bool = True,
+        **kwargs  # Accept additional parameters for compatibility
+    ) -> List[Dict]:
+        """
+        Async counterpart of generate_images.
+
+        Awaits all variants concurrently on the running event loop and
+        returns results in the same format as generate_images.
+
+        Args:
+            prompt: JSON-structured prompt
+            num_variants: Number of image variants to generate
+            use_cache: Serve and store variants through the generation cache
+            hedge: Send duplicate requests for unusually slow variants
+            deadline: Time budget in seconds for the whole request (None waits indefinitely)
+            priority: Rate scheduler class, "interactive" or "batch"
+            seeds: Seed of each variant, e.g. from an audit log entry (overrides the seed plan)
+            deterministic_seeds: Derive seeds from the prompt hash; False draws random seeds
+            **kwargs: Additional parameters (ignored for remote API)
+
+        Returns:
+            List of image result dictionaries with LazyImages, in variant order
+        """
+        results = [
+            result async for result in self.aiter_generate_images(
+                prompt, num_variants, use_cache=use_cache, hedge=hedge, deadline=deadline, priority=priority,
+                seeds=seeds, deterministic_seeds=deterministic_seeds
+            )
+        ]
+        results.sort(key=lambda r: r["variant_id"])
+        logger.info(f"🏁 generate_images_async returning {len(results)} results")
+        return results
+
+    async def aiter_generate_images(
+        self,
+        prompt: Dict,
+        num_variants: int = 2,
+        use_cache: bool = True,
+        hedge: bool = False,
+        deadline: Optional[float] = None,
+        priority: str = "interactive",
+        seeds: Optional[List[int]] = None,
+        deterministic_seeds: bool = True,
+        **kwargs  # Accept additional parameters for compatibility
+    ) -> AsyncIterator[Dict]:
+        """
+        Async counterpart of iter_generate_images.
+
+        Args:
+            prompt: JSON-structured prompt
+            num_variants: Number of image variants to generate
+            use_cache: Serve and store variants through the generation cache
+            hedge: Send duplicate requests for unusually slow variants
+            deadline: Time budget in seconds for the whole request (None waits indefinitely)
+            priority: Rate scheduler class, "interactive" or "batch"
+            seeds: Seed of each variant, e.g. from an audit log entry (overrides the seed plan)
+            deterministic_seeds: Derive seeds from the prompt hash; False draws random seeds
+            **kwargs: Additional parameters (ignored for remote API)
+
+        Yields:
+            Image result dictionaries in completion order
+        """
+        logger.info(f"🚀 FIBOClient.generate_images_async called with {num_variants} variants")
+
+        compiled = compile_prompt(prompt)
+        variant_seeds = plan_seeds(compiled, num_variants, seeds, deterministic_seeds)
+
+        produced = 0
+        async for outcome in aiter_images_from_json_prompt(
+            compiled, num_variants, use_cache=use_cache, hedge=hedge, deadline=deadline, priority=priority,
+            seeds=variant_seeds
+        ):
+            result = self._outcome_result(prompt, compiled, outcome, variant_seeds[outcome["variant_id"] - 1])
+            if result is None:
+                continue
+            produced += 1
+            yield result
+
+        if not produced:
+            for result in self._safe_mode_results(prompt, compiled, num_variants, variant_seeds):
+                yield result
+
+    def _outcome_result(
+        self,
+        prompt: Dict,
+        compiled: CompiledPrompt,
+        outcome: Dict[str, Any],
+        seed: int
+    ) -> Optional[Dict]:
+        """Turn a variant outcome into a result dictionary, or None for failed variants."""
+        if outcome["status"] == "success":
+            return self._success_result(
+                prompt, compiled, outcome["variant_id"], outcome["image"], seed, outcome["timings"]
+            )
+        if outcome["status"] == "deadline_exceeded":
+            return self._deadline_result(prompt, compiled, outcome["variant_id"], seed, outcome["timings"])
+        return None
+
+    def _deadline_result(
+        self,
+        prompt: Dict,
+        compiled: CompiledPrompt,
+        variant_num: int,
+        seed: int,
+        timings: Dict[str, float]
+    ) -> Dict:
+        """Build the result dictionary for a variant abandoned at the request deadline."""
+        timings = {phase: round(seconds, 4) for phase, seconds in timings.items()}
+        logger.warning(f"⏰ Variant {variant_num} abandoned at the request deadline")
+        return {
+            "variant_id": variant_num,
+            "status": "deadline_exceeded",
+            "image": None,
+            "prompt_used": prompt,
+            "prompt_string": compiled.variant_prompt(variant_num),
+            "generation_time": timings["total"],
+            "metadata": {
+                "model": self.model_id,
+                "provider": "huggingface-inference",
+                "seed": seed,
+                "device": "remote",
+                "latency": None,
+                "timings": timings,
+                "variant_type": "creative_variation",
+                "prompt_hash": compiled.prompt_hash
+            }
+        }
+
+    def _success_result(
+        self,
+        prompt: Dict,
+        compiled: CompiledPrompt,
+        variant_num: int,
+        image: LazyImage,
+        seed: int,
+        timings: Dict[str, float]
+    ) -> Dict:
+        """Wrap a generated image and its measured timings into an app-compatible result dictionary."""
+        timings = {phase: round(seconds, 4) for phase, seconds in timings.items()}
+        result = {
+            "variant_id": variant_num,
+            "status": "success",
+            "image": image,
+            "prompt_used": prompt,
+            "prompt_string": compiled.variant_prompt(variant_num),  # Exact prompt sent for this variant
+            "generation_time": timings["total"],
+            "metadata": {
+                "model": self.model_id,
+                "provider": "huggingface-inference",
+                "seed": seed,  # Seed sent with the request
+                "device": "remote",
+                "latency": timings["remote_call"],
+                "timings": timings,
+                "size": f"{image.size[0]}x{image.size[1]}" if hasattr(image, 'size') else "unknown",
+                "variant_type": "creative_variation",
+                "base_prompt": compiled.payload,
+                "prompt_hash": compiled.prompt_hash
+            }
+        }
+        logger.info(f"📊 Variant {variant_num} result created - Status: {result['status']}")
+        return result
+
+    def _safe_mode_results(
+        self,
+        prompt: Dict,
+        compiled: CompiledPrompt,
+        num_variants: int,
+        variant_seeds: List[int]
+    ) -> List[Dict]:
+        """Build safe mode results for every variant when remote generation failed."""
+        logger.warning(f"⚠️ Remote generation failed, falling back to safe mode for {num_variants} variants")
+        results: List[Dict[str, Any]] = []
+        for i in range(num_variants):
+            start = time.time()
+            safe_image = _safe_mode_image(compiled, i + 1)
+            timings = {phase: round(seconds, 4) for phase, seconds in _make_timings(total=time.time() - start).items()}
+            result = {
+                "variant_id": i + 1,
+                "status": "safe_mode",
+                "image": safe_image,
+                "prompt_used": prompt,
+                "prompt_string": compiled.display,
+                "generation_time": timings["total"],
+                "metadata": {
+                    "model": "safe_mode",
+                    "provider": "local-fallback",
+                    "seed": variant_seeds[i],  # Use unique seeds even in safe mode
+                    "device": "cpu",
+                    "latency": None,
+                    "timings": timings,
+                    "size": f"{safe_image.size[0]}x{safe_image.size[1]}" if hasattr(safe_image, 'size') else "512x320",
+                    "variant_type": "safe_mode",
+                    "prompt_hash": compiled.prompt_hash
+                }
+            }
+            results.append(result)
+            logger.info(f"📊 Safe mode variant {i+1} created")
         return results
     
     def validate_setup(self) -> Dict[str, bool]:
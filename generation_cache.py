@@ -0,0 +1,283 @@
+"""
+Generation Cache Module
+Content-addressed cache of generated FIBO images.
+
+Two tiers are kept: an in-memory LRU and an on-disk store, both holding
+the encoded image bytes (see lazy_image.LazyImage). Both tiers are
+bounded by a byte budget and entries expire after a TTL.
+"""
+
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+from lazy_image import LazyImage
+
+logger = logging.getLogger(__name__)
+
+# Temporary files older than this are leftovers of interrupted writes;
+# younger ones may still be in use by another process sharing the directory
+STALE_TMP_SECONDS = 600
+
+
+def make_cache_key(variant_prompt: str, seed: Optional[int] = None) -> str:
+    """
+    Build a stable cache key for one generated variant.
+
+    Args:
+        variant_prompt: Exact prompt string sent for the variant
+            (see prompt_compiler.CompiledPrompt.variant_prompt)
+        seed: Seed sent with the request, if any
+
+    Returns:
+        Hex SHA-256 digest of the prompt and seed
+    """
+    return hashlib.sha256(f"{seed}\n{variant_prompt}".encode("utf-8")).hexdigest()
+
+
+class GenerationCache:
+    """Two-tier (memory + disk) LRU cache of generated images."""
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = ".fibo_cache",
+        memory_budget_bytes: int = 256 * 1024 * 1024,
+        disk_budget_bytes: int = 2 * 1024 * 1024 * 1024,
+        ttl_seconds: Optional[float] = 7 * 24 * 3600
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory for the on-disk tier (None disables it)
+            memory_budget_bytes: Maximum encoded bytes kept in memory
+            disk_budget_bytes: Maximum encoded bytes kept on disk
+            ttl_seconds: Entry lifetime in seconds (None never expires)
+        """
+        self.cache_dir = cache_dir
+        self.memory_budget_bytes = memory_budget_bytes
+        self.disk_budget_bytes = disk_budget_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.Lock()
+        # key -> (LazyImage, nbytes, created_at)
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._memory_bytes = 0
+        # key -> (nbytes, created_at, file extension)
+        self._disk: "OrderedDict[str, tuple]" = OrderedDict()
+        self._disk_bytes = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.cache_dir:
+            self._load_disk_index()
+
+    def _load_disk_index(self):
+        """Index existing on-disk entries, oldest first, and delete stale temporary files."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            entries = []
+            now = time.time()
+            for name in os.listdir(self.cache_dir):
+                path = os.path.join(self.cache_dir, name)
+                if name.endswith(".tmp"):
+                    self._remove_stale_tmp(path, now)
+                    continue
+                # <key>.<ext>
+                key, _, ext = name.partition(".")
+                if not ext or "." in ext:
+                    continue
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, key, stat.st_size, ext))
+            for mtime, key, size, ext in sorted(entries):
+                if key in self._disk:
+                    # Same entry stored under another format; keep the newest
+                    self._drop_disk(key)
+                self._disk[key] = (size, mtime, ext)
+                self._disk_bytes += size
+        except OSError as e:
+            logger.warning(f"⚠️ Could not index generation cache at {self.cache_dir}: {e}")
+            self.cache_dir = None
+
+    @staticmethod
+    def _remove_stale_tmp(path: str, now: float):
+        """Delete a temporary file left by an interrupted write; it is outside the byte budget."""
+        try:
+            if now - os.stat(path).st_mtime > STALE_TMP_SECONDS:
+                os.remove(path)
+        except OSError:
+            pass
+
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.{ext}")
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[LazyImage]:
+        """
+        Look up a cached image.
+
+        Args:
+            key: Cache key from make_cache_key
+
+        Returns:
+            Cached LazyImage, or None on a miss
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if self._expired(entry[2]):
+                    self._drop_memory(key)
+                else:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[0]
+
+            disk_entry = self._disk.get(key) if self.cache_dir else None
+            if disk_entry is not None and self._expired(disk_entry[1]):
+                self._drop_disk(key)
+                disk_entry = None
+
+        if disk_entry is not None:
+            try:
+                with open(self._path(key, disk_entry[2]), "rb") as f:
+                    image = LazyImage(f.read())
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Dropping unreadable cache entry {key[:12]}: {e}")
+                with self._lock:
+                    self._drop_disk(key)
+            else:
+                with self._lock:
+                    if key in self._disk:
+                        self._disk.move_to_end(key)
+                    self._put_memory(key, image, disk_entry[1])
+                    self.disk_hits += 1
+                return image
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, image: LazyImage):
+        """
+        Store an image in both tiers.
+
+        The encoded bytes are stored as-is; nothing is decoded or re-encoded.
+
+        Args:
+            key: Cache key from make_cache_key
+            image: Generated image
+        """
+        created_at = time.time()
+        encoded = image.data if self.cache_dir else None
+        # Stored under the format's own extension, e.g. "jpeg" for JPEG results
+        ext = (image.format or "png").lower()
+
+        with self._lock:
+            self._put_memory(key, image, created_at)
+
+        if encoded is None or len(encoded) > self.disk_budget_bytes:
+            return
+        try:
+            tmp_path = f"{self._path(key, ext)}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(encoded)
+            os.replace(tmp_path, self._path(key, ext))
+        except OSError as e:
+            logger.warning(f"⚠️ Could not write cache entry {key[:12]}: {e}")
+            return
+
+        with self._lock:
+            previous = self._disk.get(key)
+            if previous is not None:
+                if previous[2] == ext:
+                    self._disk_bytes -= self._disk.pop(key)[0]
+                else:
+                    self._drop_disk(key)
+            self._disk[key] = (len(encoded), created_at, ext)
+            self._disk_bytes += len(encoded)
+            while self._disk_bytes > self.disk_budget_bytes and self._disk:
+                self._drop_disk(next(iter(self._disk)))
+                self.evictions += 1
+
+    def _put_memory(self, key: str, image: LazyImage, created_at: float):
+        """Insert into the memory tier and evict down to budget. Caller holds the lock."""
+        nbytes = image.nbytes
+        if nbytes > self.memory_budget_bytes:
+            return
+        if key in self._memory:
+            self._drop_memory(key)
+        self._memory[key] = (image, nbytes, created_at)
+        self._memory_bytes += nbytes
+        while self._memory_bytes > self.memory_budget_bytes and self._memory:
+            self._drop_memory(next(iter(self._memory)))
+            self.evictions += 1
+
+    def _drop_memory(self, key: str):
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry[1]
+
+    def _drop_disk(self, key: str):
+        entry = self._disk.pop(key, None)
+        if entry is not None:
+            self._disk_bytes -= entry[0]
+            try:
+                os.remove(self._path(key, entry[2]))
+            except OSError:
+                pass
+
+    def clear(self):
+        """Remove every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            for key in list(self._disk):
+                self._drop_disk(key)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with hit/miss counters and tier sizes
+        """
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups * 100 if lookups else 0,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes
+            }
+
+
+_default_cache: Optional[GenerationCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_generation_cache() -> GenerationCache:
+    """Return the process-wide cache, configured from FIBO_CACHE_* env vars."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            ttl = float(os.getenv("FIBO_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+            _default_cache = GenerationCache(
+                cache_dir=os.getenv("FIBO_CACHE_DIR", ".fibo_cache") or None,
+                memory_budget_bytes=int(float(os.getenv("FIBO_CACHE_MEMORY_MB", "256")) * 1024 * 1024),
+                disk_budget_bytes=int(float(os.getenv("FIBO_CACHE_DISK_MB", "2048")) * 1024 * 1024),
+                ttl_seconds=ttl if ttl > 0 else None
+            )
+        return _default_cache
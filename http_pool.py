@@ -0,0 +1,163 @@
+"""
+HTTP Pool Module
+Shared keep-alive connection pool for Hugging Face inference calls.
+
+huggingface_hub gives every thread its own requests.Session. Since
+generation runs on short-lived worker threads, each call would otherwise
+open (and TLS-handshake) a fresh connection. Here every session mounts
+the same HTTPAdapter, whose urllib3 pool is thread-safe and explicitly
+sized, so warm connections are reused across threads and FIBOClient
+instances. Connection setup is timed so it can be reported separately
+from server time.
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from huggingface_hub import configure_http_backend
+
+try:
+    # Keeps huggingface_hub's request-id header and error annotation
+    from huggingface_hub.utils._http import UniqueRequestIdAdapter as _BaseAdapter
+except ImportError:
+    _BaseAdapter = HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionStats:
+    """Thread-safe counters for connection setup and reuse."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.requests = 0
+        self.connections_opened = 0
+        self.connect_seconds = 0.0
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_connect(self, seconds: float):
+        with self._lock:
+            self.connections_opened += 1
+            self.connect_seconds += seconds
+        self._local.connect_seconds = self.thread_connect_seconds() + seconds
+
+    def thread_connect_seconds(self) -> float:
+        """Connection setup time spent so far on the calling thread."""
+        return getattr(self._local, "connect_seconds", 0.0)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "connections_opened": self.connections_opened,
+                "connect_seconds": self.connect_seconds
+            }
+
+
+_stats = ConnectionStats()
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _stats.record_connect(time.perf_counter() - start)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        # Covers the TCP connect and the TLS handshake
+        start = time.perf_counter()
+        super().connect()
+        _stats.record_connect(time.perf_counter() - start)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class PooledAdapter(_BaseAdapter):
+    """HTTPAdapter whose connection pools time every new connection."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool
+        }
+
+    def send(self, request, *args, **kwargs):
+        _stats.record_request()
+        return super().send(request, *args, **kwargs)
+
+
+_adapter: Optional[PooledAdapter] = None
+_adapter_lock = threading.Lock()
+
+
+def configure_http_pool(pool_maxsize: int = 32, pool_connections: int = 10):
+    """
+    Route all huggingface_hub HTTP calls through one shared connection pool.
+
+    Safe to call more than once; only the first call takes effect.
+
+    Args:
+        pool_maxsize: Keep-alive connections kept per host
+        pool_connections: Number of hosts with a connection pool
+    """
+    global _adapter
+    with _adapter_lock:
+        if _adapter is not None:
+            return
+        _adapter = PooledAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+
+    def backend_factory() -> requests.Session:
+        session = requests.Session()
+        session.mount("http://", _adapter)
+        session.mount("https://", _adapter)
+        return session
+
+    configure_http_backend(backend_factory=backend_factory)
+    logger.info(f"🔌 Shared HTTP pool configured ({pool_maxsize} connections per host)")
+
+
+def thread_connect_seconds() -> float:
+    """Connection setup time spent so far on the calling thread (for per-call deltas)."""
+    return _stats.thread_connect_seconds()
+
+
+def get_http_pool_metrics() -> Dict[str, Any]:
+    """
+    Get connection pool metrics.
+
+    Returns:
+        Dictionary with pool size, open pools, request and handshake
+        counts, connection reuse ratio and connect time
+    """
+    stats = _stats.snapshot()
+    requests_sent = stats["requests"]
+    opened = stats["connections_opened"]
+    connect_seconds = stats["connect_seconds"]
+    return {
+        "configured": _adapter is not None,
+        "pool_maxsize": _adapter._pool_maxsize if _adapter is not None else 0,
+        "host_pools": len(_adapter.poolmanager.pools) if _adapter is not None else 0,
+        "requests": requests_sent,
+        "handshakes": opened,
+        "reuse_ratio": max(0.0, 1 - opened / requests_sent) if requests_sent else 0.0,
+        "avg_connect_time": connect_seconds / opened if opened else 0.0
+    }
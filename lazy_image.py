@@ -0,0 +1,114 @@
+"""
+Lazy Image Module
+Encoded image handle that defers pixel decoding.
+
+Generated images are kept as the encoded bytes returned by the endpoint
+(typically a few hundred KB) instead of a decoded RGB buffer (about 3 MB
+at 1024x1024). Size, mode and format are read from the header only;
+pixels are decoded when to_pil() is called.
+"""
+
+import io
+from typing import TYPE_CHECKING, BinaryIO, Optional, Union
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+
+class LazyImage:
+    """Encoded image bytes with header metadata; decoded on demand."""
+
+    __slots__ = ("data", "format", "size", "mode")
+
+    def __init__(self, data: bytes):
+        """
+        Wrap encoded image bytes.
+
+        Args:
+            data: Encoded image (PNG, JPEG, WEBP, ...)
+
+        Raises:
+            PIL.UnidentifiedImageError: If the bytes are not a readable image
+        """
+        from PIL import Image
+
+        self.data = data
+        # Image.open only parses the header; pixels stay encoded
+        with Image.open(io.BytesIO(data)) as header:
+            self.format = header.format
+            self.size = header.size
+            self.mode = header.mode
+
+    @classmethod
+    def from_pil(cls, image: "Image.Image", format: str = "PNG") -> "LazyImage":
+        """
+        Build a LazyImage from a PIL image.
+
+        An image that was opened from an in-memory buffer and whose pixels
+        were never loaded (as returned by InferenceClient.text_to_image)
+        reuses its original encoded bytes. Once the pixels are loaded they
+        may have been modified in place, so the image is encoded again.
+
+        Args:
+            image: PIL image
+            format: Encoding used when the original bytes are not available
+
+        Returns:
+            LazyImage
+        """
+        fp = getattr(image, "fp", None)
+        # Pillow drops fp once load() has decoded a single-frame image; the
+        # pixel buffer ("_im", or "im" in older Pillow) covers the rest
+        state = vars(image)
+        pixels_loaded = state.get("_im", state.get("im")) is not None
+        if image.format and isinstance(fp, io.BytesIO) and not pixels_loaded:
+            return cls(fp.getvalue())
+        buffer = io.BytesIO()
+        image.save(buffer, format=format)
+        return cls(buffer.getvalue())
+
+    @property
+    def width(self) -> int:
+        return self.size[0]
+
+    @property
+    def height(self) -> int:
+        return self.size[1]
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the encoded data in bytes."""
+        return len(self.data)
+
+    def to_pil(self) -> "Image.Image":
+        """
+        Decode the pixels.
+
+        Each call decodes again; keep the result only as long as the
+        pixels are needed.
+
+        Returns:
+            Decoded RGB PIL image
+        """
+        from PIL import Image
+        return Image.open(io.BytesIO(self.data)).convert("RGB")
+
+    def save(self, fp: Union[str, BinaryIO], format: Optional[str] = None):
+        """
+        Save the image, writing the encoded bytes as-is when no other format is requested.
+
+        Args:
+            fp: File path or binary file object
+            format: Target format (defaults to the original format)
+        """
+        if format is not None and format.upper() != self.format:
+            self.to_pil().save(fp, format=format)
+            return
+        if isinstance(fp, str):
+            with open(fp, "wb") as f:
+                f.write(self.data)
+        else:
+            fp.write(self.data)
+
+    def __repr__(self) -> str:
+        return f"<LazyImage {self.format} {self.mode} {self.size[0]}x{self.size[1]} ({len(self.data)} bytes)>"
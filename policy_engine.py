@@ -3,24 +3,354 @@ Policy Engine Module
 Enforces brand policies and guidelines on image generation prompts.
 """
 
+import os
+import sys
 import json
-from typing import Dict, List, Tuple
+import hashlib
+import logging
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
+from policy_matcher import PolicyMatcher, TermMatch
+
+logger = logging.getLogger(__name__)
+
+# Any of these in the prompt satisfies minimum_quality "high"
+QUALITY_KEYWORDS = ["high quality", "professional", "detailed", "sharp"]
+
+# Directory, next to the brand profiles, of shared prohibited term lists
+# referenced by name from a profile's "prohibited_lists"
+TERM_LISTS_DIR = "term_lists"
+
+
+def term_list_path(lists_dir: str, name: str) -> str:
+    """
+    Path of a shared term list.
+
+    Args:
+        lists_dir: Directory of <name>.json term lists
+        name: List name as referenced in "prohibited_lists"
+
+    Raises:
+        ValueError: If the name is not a plain file name
+    """
+    if not name or name.startswith(".") or os.sep in name or (os.altsep and os.altsep in name):
+        raise ValueError(f"Invalid prohibited list name '{name}'")
+    return os.path.join(lists_dir, f"{name}.json")
+
+
+class SharedTermList:
+    """
+    Prohibited term list kept in its own file (a JSON array of strings)
+    and referenced by name from any number of brand profiles.
+
+    The list is compiled into its own matcher, so brands that use it
+    share the terms and the matcher whatever else their profiles contain.
+    """
+
+    __slots__ = ("name", "path", "stamp", "terms", "positions", "digest", "matcher", "__weakref__")
+
+    def __init__(self, name: str, path: str):
+        """
+        Load and compile a term list.
+
+        Args:
+            name: List name
+            path: List file
+
+        Raises:
+            OSError: If the file cannot be read
+            ValueError: If it is not a JSON array of strings
+        """
+        # Stat before reading, so a change made while loading is seen on the next check
+        stat = os.stat(path)
+        with open(path, 'r', encoding="utf-8") as f:
+            terms = json.load(f)
+        if not isinstance(terms, list) or not all(isinstance(term, str) for term in terms):
+            raise ValueError(f"Prohibited list {path} must be a JSON array of strings")
+
+        self.name = name
+        self.path = path
+        self.stamp = (stat.st_mtime_ns, stat.st_size)
+        self.terms = tuple(dict.fromkeys(sys.intern(term) for term in terms if term))
+        # Lowercased term -> position, for membership and violation order
+        self.positions: Dict[str, int] = {}
+        for position, term in enumerate(self.terms):
+            self.positions.setdefault(term.lower(), position)
+        self.digest = hashlib.sha256("\n".join(self.terms).encode("utf-8")).hexdigest()
+        self.matcher = PolicyMatcher({"prohibited": self.terms})
+
+    def approx_bytes(self) -> int:
+        """Rough memory footprint of the list, its index and its matcher."""
+        return self.matcher.approx_bytes() + sys.getsizeof(self.terms) + sys.getsizeof(self.positions)
+
+
+class ValidationResult:
+    """
+    Outcome of one validate_prompt call.
+
+    Unpacks like the (is_valid, violations, warnings) tuple returned
+    before, so existing callers keep working.
+    """
+
+    __slots__ = ("violations", "warnings", "prohibited_matches", "profile_version")
+
+    def __init__(
+        self,
+        violations: List[str],
+        warnings: List[str],
+        prohibited_matches: List[TermMatch],
+        profile_version: str
+    ):
+        """
+        Initialize a result.
+
+        Args:
+            violations: Policy violations (any violation blocks generation)
+            warnings: Non-blocking recommendations
+            prohibited_matches: Where each prohibited term was found
+            profile_version: Version of the brand profile that made the decision
+        """
+        self.violations = violations
+        self.warnings = warnings
+        self.prohibited_matches = prohibited_matches
+        self.profile_version = profile_version
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.violations
+
+    def __iter__(self) -> Iterator:
+        return iter((self.is_valid, self.violations, self.warnings))
+
+    def to_dict(self) -> Dict:
+        """
+        Policy decision dictionary for the audit log.
+
+        Returns:
+            Dictionary with is_valid, violations, warnings,
+            prohibited_matches and profile_version
+        """
+        return {
+            "is_valid": self.is_valid,
+            "violations": list(self.violations),
+            "warnings": list(self.warnings),
+            "prohibited_matches": [m.to_dict() for m in self.prohibited_matches],
+            "profile_version": self.profile_version
+        }
+
+
+class CompiledPolicy:
+    """
+    Brand profile compiled for validation; immutable once built.
+
+    Terms are lowercased and deduplicated once, so every check is a set
+    lookup or a single matcher scan per term list. Instances can be shared
+    freely between threads and engines.
+
+    Prohibited terms come from the profile's own "prohibited_content" and
+    from the shared lists named in "prohibited_lists" (see SharedTermList).
+    """
+
+    __slots__ = (
+        "profile", "version", "brand_name", "prohibited_terms", "prohibited_lists", "allowed_themes",
+        "theme_keys", "color_preferences", "color_keys", "require_high_quality", "tone", "matcher"
+    )
+
+    def __init__(self, brand_profile: Dict, shared=None, lists_dir: Optional[str] = None):
+        """
+        Compile a brand profile.
+
+        Args:
+            brand_profile: Parsed brand profile JSON
+            shared: Optional policy_registry.SharedArtifacts; shared term
+                lists and matchers already compiled for another brand are
+                reused instead of built again
+            lists_dir: Directory of the shared term lists named in
+                "prohibited_lists" (see TERM_LISTS_DIR)
+
+        Raises:
+            OSError: If a referenced term list cannot be read
+            ValueError: If a referenced term list is invalid
+        """
+        policies = brand_profile.get("policies", {})
+        intern = shared.terms if shared is not None else tuple
+        list_names = list(dict.fromkeys(policies.get("prohibited_lists", [])))
+        if list_names and lists_dir is None:
+            raise ValueError("Brand profile uses prohibited_lists but no term list directory is set")
+        load_list = shared.term_list if shared is not None else (
+            lambda directory, name: SharedTermList(name, term_list_path(directory, name))
+        )
+        prohibited_lists = tuple(load_list(lists_dir, name) for name in list_names)
+        allowed_themes = intern(policies.get("allowed_themes", []))
+        color_preferences = intern(policies.get("color_preferences", []))
+        require_high_quality = brand_profile.get("requirements", {}).get("minimum_quality") == "high"
+        # Content hash, so the same profile and lists always have the same version
+        version = hashlib.sha256(json.dumps(brand_profile, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        for term_list in prohibited_lists:
+            version.update(term_list.digest.encode("ascii"))
+        values = {
+            "profile": brand_profile,
+            "version": version.hexdigest()[:16],
+            "brand_name": brand_profile.get("brand_name", "Unknown"),
+            # Profile order, duplicates and terms already in a shared list dropped;
+            # violations are reported in this order, then in list order
+            "prohibited_terms": intern(
+                term for term in dict.fromkeys(policies.get("prohibited_content", []))
+                if not any(term.lower() in term_list.positions for term_list in prohibited_lists)
+            ),
+            "prohibited_lists": prohibited_lists,
+            "allowed_themes": allowed_themes,
+            "theme_keys": intern(dict.fromkeys(theme.lower() for theme in allowed_themes)),
+            "color_preferences": color_preferences,
+            "color_keys": frozenset(color.lower() for color in color_preferences),
+            "require_high_quality": require_high_quality,
+            "tone": policies.get("style_guidelines", {}).get("tone", ""),
+        }
+        # Prohibited terms and quality keywords are matched in one pass per prompt
+        quality_terms = tuple(QUALITY_KEYWORDS) if require_high_quality else ()
+        if shared is not None:
+            values["matcher"] = shared.matcher(values["prohibited_terms"], quality_terms)
+        else:
+            values["matcher"] = PolicyMatcher({"prohibited": values["prohibited_terms"], "quality": quality_terms})
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledPolicy is immutable")
+
+    def validate(self, prompt: Dict) -> ValidationResult:
+        """
+        Validate a prompt (see PolicyEngine.validate_prompt).
+
+        Args:
+            prompt: JSON prompt to validate
+
+        Returns:
+            ValidationResult
+        """
+        matches = self.matcher.scan(prompt)
+        prohibited_matches = [m for m in matches if m.category == "prohibited"]
+        for term_list in self.prohibited_lists:
+            prohibited_matches.extend(term_list.matcher.scan(prompt))
+
+        # Check for prohibited content
+        violations = self._check_prohibited_content(prohibited_matches)
+
+        # Check theme alignment, color preferences and quality requirements
+        warnings = (
+            self._check_theme_alignment(prompt)
+            + self._check_color_preferences(prompt)
+            + self._check_quality_requirements(matches)
+        )
+
+        return ValidationResult(violations, warnings, prohibited_matches, self.version)
+
+    def _check_prohibited_content(self, prohibited_matches: List[TermMatch]) -> List[str]:
+        """Check for prohibited content in prompt; returns violations."""
+        if not prohibited_matches:
+            return []
+        found = {m.term.lower() for m in prohibited_matches}
+        terms = [term for term in self.prohibited_terms if term.lower() in found]
+        for term_list in self.prohibited_lists:
+            listed = sorted(term_list.positions[key] for key in found if key in term_list.positions)
+            terms.extend(term_list.terms[position] for position in listed)
+        # A term in several shared lists is reported once
+        return [f"Prohibited content detected: '{term}'" for term in dict.fromkeys(terms)]
+
+    def _check_theme_alignment(self, prompt: Dict) -> List[str]:
+        """Check if prompt aligns with allowed themes; returns warnings."""
+        if not self.theme_keys:
+            return []
+
+        # Extract style or theme from prompt
+        style = str(prompt.get("style") or "").lower()
+        if not style:
+            return []
+        scene = str(prompt.get("scene") or "").lower()
+
+        # Check if any allowed theme is mentioned
+        if any(theme in style or theme in scene for theme in self.theme_keys):
+            return []
+        return [
+            f"Prompt theme may not align with brand preferences. "
+            f"Preferred themes: {', '.join(self.allowed_themes)}"
+        ]
+
+    def _check_color_preferences(self, prompt: Dict) -> List[str]:
+        """Check color preferences; returns warnings."""
+        if not self.color_keys:
+            return []
+
+        # Check if colors are mentioned in prompt
+        colors = prompt.get("colors", [])
+        if isinstance(colors, str):
+            colors = [colors]
+
+        non_preferred = [c for c in colors if str(c).lower() not in self.color_keys]
+        if not non_preferred:
+            return []
+        return [
+            f"Non-preferred colors detected: {', '.join(str(c) for c in non_preferred)}. "
+            f"Brand prefers: {', '.join(self.color_preferences)}"
+        ]
+
+    def _check_quality_requirements(self, matches: List[TermMatch]) -> List[str]:
+        """Check quality requirements; returns warnings."""
+        if self.require_high_quality and not any(m.category == "quality" for m in matches):
+            return ["Consider adding quality modifiers (e.g., 'high quality', 'professional')"]
+        return []
 
 
 class PolicyEngine:
-    """Engine for enforcing brand policies on prompts."""
+    """
+    Engine for enforcing brand policies on prompts.
+
+    The brand profile is compiled into an immutable CompiledPolicy at load
+    time and validation keeps no per-call state on the engine, so one
+    instance can be shared by concurrent sessions and threads without locking.
+
+    With a reload interval, a background thread polls the profile file
+    (and the shared term lists it uses) and swaps in a recompiled policy
+    when one of them changes. The swap is a single
+    attribute assignment: validations already running finish on the policy
+    they started with, and every result names its profile_version.
+    """
     
-    def __init__(self, brand_profile_path: str = "brand_profile.json"):
+    def __init__(
+        self,
+        brand_profile_path: str = "brand_profile.json",
+        reload_interval: Optional[float] = None,
+        shared=None,
+        lists_dir: Optional[str] = None
+    ):
         """
         Initialize policy engine with brand profile.
         
         Args:
             brand_profile_path: Path to brand profile JSON file
+            reload_interval: Seconds between checks of the profile file for
+                changes (None disables hot reload)
+            shared: Optional policy_registry.SharedArtifacts used when compiling
+            lists_dir: Directory of shared term lists (defaults to
+                TERM_LISTS_DIR next to the profile file)
         """
-        self.brand_profile = self._load_brand_profile(brand_profile_path)
-        self.violations = []
-        self.warnings = []
+        self.brand_profile_path = brand_profile_path
+        self.lists_dir = lists_dir or os.path.join(os.path.dirname(os.path.abspath(brand_profile_path)), TERM_LISTS_DIR)
+        self._shared = shared
+        profile_stamp = self._stat(brand_profile_path)
+        self.policy = CompiledPolicy(self._load_brand_profile(brand_profile_path), shared, self.lists_dir)
+        self._profile_stamp = self._policy_stamp(profile_stamp, self.policy)
+        self._reload_lock = threading.Lock()
+        self._stop_watching = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        if reload_interval:
+            self.start_watching(reload_interval)
+
+    @property
+    def brand_profile(self) -> Dict:
+        """Brand profile the current policy was compiled from."""
+        return self.policy.profile
     
     def _load_brand_profile(self, path: str) -> Dict:
         """Load brand profile from JSON file."""
@@ -37,7 +367,98 @@ class PolicyEngine:
                 }
             }
     
-    def validate_prompt(self, prompt: Dict) -> Tuple[bool, List[str], List[str]]:
+    @staticmethod
+    def _stat(path: str) -> Optional[Tuple[int, int]]:
+        """Modification time and size of a file, or None if it is missing."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _policy_stamp(profile_stamp: Optional[Tuple[int, int]], policy: CompiledPolicy) -> Tuple:
+        """Stamp of a profile and of the shared term lists as they were when compiled."""
+        return profile_stamp, tuple(term_list.stamp for term_list in policy.prohibited_lists)
+
+    def _stat_profile(self) -> Tuple:
+        """Current stamp of the profile file and the shared term lists the policy uses."""
+        return self._stat(self.brand_profile_path), tuple(
+            self._stat(term_list.path) for term_list in self.policy.prohibited_lists
+        )
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Recompile the brand profile if the file changed and swap it in.
+
+        A profile or term list that is missing or cannot be parsed (e.g.
+        caught half written) is skipped and the current policy stays in effect.
+
+        Args:
+            force: Re-read the file even if it looks unchanged
+
+        Returns:
+            True if a new policy version was swapped in
+        """
+        with self._reload_lock:
+            stamp = self._stat_profile()
+            if stamp == self._profile_stamp and not force:
+                return False
+            self._profile_stamp = stamp
+            if stamp[0] is None:
+                logger.warning(f"⚠️ Brand profile {self.brand_profile_path} is missing - keeping version {self.policy.version}")
+                return False
+            try:
+                with open(self.brand_profile_path, 'r') as f:
+                    profile = json.load(f)
+                policy = CompiledPolicy(profile, self._shared, self.lists_dir)
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Could not reload brand profile: {e} - keeping version {self.policy.version}")
+                return False
+            # Watch the lists the new profile uses, as they were when compiled
+            self._profile_stamp = self._policy_stamp(stamp[0], policy)
+            if policy.version == self.policy.version:
+                return False
+            previous, self.policy = self.policy.version, policy
+            logger.info(f"🔄 Brand profile reloaded: version {previous} -> {policy.version}")
+            return True
+
+    def start_watching(self, interval: float = 5.0):
+        """
+        Poll the profile file in a background thread and reload it when it changes.
+
+        Args:
+            interval: Seconds between checks
+        """
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval,), name="brand-profile-watcher", daemon=True
+        )
+        self._watcher.start()
+        logger.info(f"👀 Watching {self.brand_profile_path} for changes every {interval:g}s")
+
+    def stop_watching(self):
+        """Stop the background watcher, if running."""
+        self._stop_watching.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self, interval: float):
+        while not self._stop_watching.wait(interval):
+            try:
+                self.reload()
+            except Exception as e:
+                logger.error(f"❌ Brand profile watcher error: {type(e).__name__}: {e}")
+
+    @property
+    def profile_version(self) -> str:
+        """Version hash of the policy currently in effect."""
+        return self.policy.version
+
+    def validate_prompt(self, prompt: Dict) -> ValidationResult:
         """
         Validate prompt against brand policies.
         
@@ -45,97 +466,9 @@ class PolicyEngine:
             prompt: JSON prompt to validate
             
         Returns:
-            Tuple of (is_valid, violations, warnings)
+            ValidationResult for this call; unpacks to (is_valid, violations, warnings)
         """
-        self.violations = []
-        self.warnings = []
-        
-        # Check for prohibited content
-        self._check_prohibited_content(prompt)
-        
-        # Check theme alignment
-        self._check_theme_alignment(prompt)
-        
-        # Check color preferences
-        self._check_color_preferences(prompt)
-        
-        # Check quality requirements
-        self._check_quality_requirements(prompt)
-        
-        is_valid = len(self.violations) == 0
-        
-        return is_valid, self.violations, self.warnings
-    
-    def _check_prohibited_content(self, prompt: Dict):
-        """Check for prohibited content in prompt."""
-        prohibited = self.brand_profile.get("policies", {}).get("prohibited_content", [])
-        
-        # Convert prompt to string for checking
-        prompt_str = json.dumps(prompt).lower()
-        
-        for term in prohibited:
-            if term.lower() in prompt_str:
-                self.violations.append(
-                    f"Prohibited content detected: '{term}'"
-                )
-    
-    def _check_theme_alignment(self, prompt: Dict):
-        """Check if prompt aligns with allowed themes."""
-        allowed_themes = self.brand_profile.get("policies", {}).get("allowed_themes", [])
-        
-        if not allowed_themes:
-            return
-        
-        # Extract style or theme from prompt
-        style = prompt.get("style", "").lower()
-        scene = prompt.get("scene", "").lower()
-        
-        # Check if any allowed theme is mentioned
-        has_allowed_theme = False
-        for theme in allowed_themes:
-            if theme.lower() in style or theme.lower() in scene:
-                has_allowed_theme = True
-                break
-        
-        if style and not has_allowed_theme:
-            self.warnings.append(
-                f"Prompt theme may not align with brand preferences. "
-                f"Preferred themes: {', '.join(allowed_themes)}"
-            )
-    
-    def _check_color_preferences(self, prompt: Dict):
-        """Check color preferences."""
-        color_prefs = self.brand_profile.get("policies", {}).get("color_preferences", [])
-        
-        if not color_prefs:
-            return
-        
-        # Check if colors are mentioned in prompt
-        colors = prompt.get("colors", [])
-        if isinstance(colors, str):
-            colors = [colors]
-        
-        if colors:
-            non_preferred = [c for c in colors if c.lower() not in [p.lower() for p in color_prefs]]
-            if non_preferred:
-                self.warnings.append(
-                    f"Non-preferred colors detected: {', '.join(non_preferred)}. "
-                    f"Brand prefers: {', '.join(color_prefs)}"
-                )
-    
-    def _check_quality_requirements(self, prompt: Dict):
-        """Check quality requirements."""
-        requirements = self.brand_profile.get("requirements", {})
-        
-        if requirements.get("minimum_quality") == "high":
-            quality_keywords = ["high quality", "professional", "detailed", "sharp"]
-            prompt_str = json.dumps(prompt).lower()
-            
-            has_quality = any(kw in prompt_str for kw in quality_keywords)
-            if not has_quality:
-                self.warnings.append(
-                    "Consider adding quality modifiers (e.g., 'high quality', 'professional')"
-                )
+        return self.policy.validate(prompt)
     
     def get_policy_summary(self) -> Dict:
         """
@@ -144,10 +477,13 @@ class PolicyEngine:
         Returns:
             Dictionary with policy information
         """
+        policy = self.policy
+        profile = policy.profile
         return {
-            "brand_name": self.brand_profile.get("brand_name", "Unknown"),
-            "policies": self.brand_profile.get("policies", {}),
-            "requirements": self.brand_profile.get("requirements", {})
+            "brand_name": profile.get("brand_name", "Unknown"),
+            "profile_version": policy.version,
+            "policies": profile.get("policies", {}),
+            "requirements": profile.get("requirements", {})
         }
     
     def enhance_prompt(self, prompt: Dict) -> Dict:
@@ -160,22 +496,20 @@ class PolicyEngine:
         Returns:
             Enhanced prompt
         """
+        policy = self.policy
         enhanced = prompt.copy()
         
         # Add quality modifiers if needed
-        requirements = self.brand_profile.get("requirements", {})
-        if requirements.get("minimum_quality") == "high":
-            if "modifiers" not in enhanced:
-                enhanced["modifiers"] = []
+        if policy.require_high_quality:
+            # Copy the list so the caller's prompt is never modified
+            enhanced["modifiers"] = list(enhanced.get("modifiers") or [])
             if "high quality" not in enhanced["modifiers"]:
                 enhanced["modifiers"].append("high quality")
             if "professional" not in enhanced["modifiers"]:
                 enhanced["modifiers"].append("professional")
         
         # Add style guidelines
-        style_guide = self.brand_profile.get("policies", {}).get("style_guidelines", {})
-        tone = style_guide.get("tone", "")
-        if tone and "style" in enhanced:
-            enhanced["style"] = f"{enhanced['style']}, {tone}"
+        if policy.tone and "style" in enhanced:
+            enhanced["style"] = f"{enhanced['style']}, {policy.tone}"
         
         return enhanced
@@ -0,0 +1,172 @@
+"""
+Policy Matcher Module
+Multi-term matching of governed prompts against brand policy term lists.
+
+All terms (prohibited content, quality keywords, ...) are compiled once
+into an Aho-Corasick automaton. Each text field of a prompt is then
+scanned in a single pass regardless of how many terms there are, and
+every match is reported with the field path and character offsets.
+Matching is case-insensitive substring matching.
+"""
+
+import sys
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class TermMatch:
+    """One occurrence of a policy term in a prompt field."""
+
+    __slots__ = ("term", "category", "path", "start", "end")
+
+    def __init__(self, term: str, category: str, path: str, start: int, end: int):
+        """
+        Initialize a match.
+
+        Args:
+            term: Term as written in the brand profile
+            category: Term list the term came from, e.g. "prohibited"
+            path: Field path in the prompt, e.g. "modifiers[1]"
+            start: Offset of the first matched character in the field
+            end: Offset just past the last matched character
+        """
+        self.term = term
+        self.category = category
+        self.path = path
+        self.start = start
+        self.end = end
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"term": self.term, "category": self.category, "path": self.path, "start": self.start, "end": self.end}
+
+    def __repr__(self) -> str:
+        return f"<TermMatch {self.category}:{self.term!r} at {self.path}[{self.start}:{self.end}]>"
+
+
+def iter_text_fields(value: Any, path: str = "") -> Iterator[Tuple[str, str]]:
+    """
+    Walk a JSON prompt and yield every string leaf with its field path.
+
+    Args:
+        value: Prompt (or part of it)
+        path: Path of value within the prompt
+
+    Yields:
+        (path, text) pairs, e.g. ("scene", "..."), ("colors[0]", "blue")
+    """
+    if isinstance(value, str):
+        yield path, value
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            yield from iter_text_fields(item, f"{path}.{key}" if path else str(key))
+    elif isinstance(value, (list, tuple)):
+        for index, item in enumerate(value):
+            yield from iter_text_fields(item, f"{path}[{index}]")
+
+
+class PolicyMatcher:
+    """Aho-Corasick automaton over one or more categorized term lists."""
+
+    def __init__(self, terms_by_category: Dict[str, Iterable[str]]):
+        """
+        Compile the term lists.
+
+        Args:
+            terms_by_category: Term lists keyed by category name; empty
+                terms are ignored and duplicates within a category kept once
+        """
+        # Node 0 is the root; edges, failure links and outputs per node
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+        # (term, category, length) per pattern index
+        self._patterns: List[Tuple[str, str, int]] = []
+        self._approx_bytes: Optional[int] = None
+
+        seen = set()
+        for category, terms in terms_by_category.items():
+            for term in terms:
+                key = term.lower()
+                if not key or (category, key) in seen:
+                    continue
+                seen.add((category, key))
+                self._add(key, len(self._patterns))
+                self._patterns.append((term, category, len(key)))
+        self._link()
+
+    def _add(self, key: str, pattern_index: int):
+        node = 0
+        for ch in key:
+            child = self._goto[node].get(ch)
+            if child is None:
+                child = len(self._goto)
+                self._goto[node][ch] = child
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            node = child
+        self._output[node] += (pattern_index,)
+
+    def _link(self):
+        """Compute failure links breadth-first and merge outputs along them."""
+        # Children of the root keep the root (0) as their failure link
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                link = self._goto[fallback].get(ch, 0)
+                self._fail[child] = link
+                self._output[child] += self._output[link]
+
+    @property
+    def num_terms(self) -> int:
+        return len(self._patterns)
+
+    def approx_bytes(self) -> int:
+        """Rough memory footprint of the automaton (containers only; term strings are shared)."""
+        if self._approx_bytes is None:
+            size = sys.getsizeof(self._goto) + sys.getsizeof(self._fail) + sys.getsizeof(self._output)
+            size += sum(sys.getsizeof(edges) for edges in self._goto)
+            size += sum(sys.getsizeof(out) for out in self._output)
+            self._approx_bytes = size + sys.getsizeof(self._patterns) + 64 * len(self._patterns)
+        return self._approx_bytes
+
+    def find(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """
+        Find every term occurrence in a text in one pass.
+
+        Args:
+            text: Text to scan (matched case-insensitively)
+
+        Yields:
+            (start, end, pattern_index) for each occurrence, by end offset
+        """
+        goto, fail, output, patterns = self._goto, self._fail, self._output, self._patterns
+        node = 0
+        for i, ch in enumerate(text.lower()):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for pattern_index in output[node]:
+                yield i + 1 - patterns[pattern_index][2], i + 1, pattern_index
+
+    def scan(self, prompt: Any) -> List[TermMatch]:
+        """
+        Scan every text field of a prompt.
+
+        Args:
+            prompt: Governed JSON prompt
+
+        Returns:
+            All matches, in field order and then by offset
+        """
+        matches: List[TermMatch] = []
+        for path, text in iter_text_fields(prompt):
+            for start, end, pattern_index in self.find(text):
+                term, category, _ = self._patterns[pattern_index]
+                matches.append(TermMatch(term, category, path, start, end))
+        return matches
@@ -0,0 +1,275 @@
+"""
+Policy Registry Module
+Brand policy engines for many brands, looked up by brand id.
+
+Brand profiles live in one directory as <brand_id>.json. Each brand's
+PolicyEngine is compiled on first use and kept in an LRU; the least
+recently used engines are dropped when the compiled policies exceed a
+memory budget, and compiled again if the brand comes back.
+
+Prohibited term lists common to several brands (e.g. a legal list) live
+in <profiles_dir>/term_lists/<name>.json and are referenced from each
+profile's "prohibited_lists". Each such list is loaded and compiled into
+its own matcher once, however many brands use it and whatever their
+other terms. Brands with identical own prohibited terms also share one
+matcher. Shared artifacts are held weakly and freed with their last brand.
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from policy_engine import PolicyEngine, SharedTermList, term_list_path
+from policy_matcher import PolicyMatcher
+
+logger = logging.getLogger(__name__)
+
+
+class PolicyLoadError(Exception):
+    """Raised when a brand's profile or a shared term list it uses cannot be loaded."""
+
+
+class SharedArtifacts:
+    """Shared term lists and matchers used by every brand in a registry; held weakly."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (path, mtime_ns, size) -> list, so an edited list file is loaded again
+        self._lists: "weakref.WeakValueDictionary[Tuple, SharedTermList]" = weakref.WeakValueDictionary()
+        self._matchers: "weakref.WeakValueDictionary[Tuple, PolicyMatcher]" = weakref.WeakValueDictionary()
+        self.lists_loaded = 0
+        self.lists_shared = 0
+        self.matchers_built = 0
+        self.matchers_shared = 0
+
+    @staticmethod
+    def terms(terms: Iterable[str]) -> Tuple[str, ...]:
+        """
+        Intern the strings of a profile's own term list.
+
+        Args:
+            terms: Terms in profile order
+
+        Returns:
+            Tuple of interned strings (freed with the last policy using them)
+        """
+        return tuple(sys.intern(str(term)) for term in terms)
+
+    def term_list(self, lists_dir: str, name: str) -> SharedTermList:
+        """
+        Return a shared term list, loading and compiling it only once per file version.
+
+        Args:
+            lists_dir: Directory of <name>.json term lists
+            name: List name as referenced in "prohibited_lists"
+
+        Returns:
+            SharedTermList, shared while any policy still uses it
+
+        Raises:
+            OSError: If the list file cannot be read
+            ValueError: If the name or the file is invalid
+        """
+        path = os.path.abspath(term_list_path(lists_dir, name))
+        stat = os.stat(path)
+        with self._lock:
+            term_list = self._lists.get((path, stat.st_mtime_ns, stat.st_size))
+            if term_list is not None:
+                self.lists_shared += 1
+                return term_list
+        term_list = SharedTermList(name, path)
+        with self._lock:
+            # Another brand may have loaded the same list meanwhile
+            existing = self._lists.setdefault((path,) + term_list.stamp, term_list)
+            if existing is term_list:
+                self.lists_loaded += 1
+                logger.info(f"📚 Loaded shared prohibited list {name} ({len(term_list.terms)} terms)")
+            else:
+                self.lists_shared += 1
+            return existing
+
+    def matcher(self, prohibited_terms: Tuple[str, ...], quality_terms: Tuple[str, ...]) -> PolicyMatcher:
+        """
+        Return the matcher for a pair of term lists, compiling it only once.
+
+        Args:
+            prohibited_terms: Prohibited terms (see CompiledPolicy)
+            quality_terms: Quality keywords, empty if quality is not required
+
+        Returns:
+            PolicyMatcher, shared while any policy still uses it
+        """
+        key = (prohibited_terms, quality_terms)
+        with self._lock:
+            matcher = self._matchers.get(key)
+            if matcher is not None:
+                self.matchers_shared += 1
+                return matcher
+        matcher = PolicyMatcher({"prohibited": prohibited_terms, "quality": quality_terms})
+        with self._lock:
+            # Another brand may have compiled the same lists meanwhile
+            existing = self._matchers.setdefault(key, matcher)
+            if existing is matcher:
+                self.matchers_built += 1
+            else:
+                self.matchers_shared += 1
+            return existing
+
+    def get_metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "term_lists": len(self._lists),
+                "lists_loaded": self.lists_loaded,
+                "lists_shared": self.lists_shared,
+                "matchers": len(self._matchers),
+                "matchers_built": self.matchers_built,
+                "matchers_shared": self.matchers_shared
+            }
+
+
+class PolicyRegistry:
+    """Lazily compiled, memory-bounded PolicyEngines keyed by brand id."""
+
+    def __init__(
+        self,
+        profiles_dir: str,
+        memory_budget_bytes: int = 64 * 1024 * 1024,
+        reload_interval: Optional[float] = 5.0
+    ):
+        """
+        Initialize the registry.
+
+        Args:
+            profiles_dir: Directory of <brand_id>.json brand profiles, with
+                shared term lists in its term_lists subdirectory
+            memory_budget_bytes: Budget for compiled policies; least recently
+                used brands are evicted beyond it (the last one used is always kept)
+            reload_interval: Minimum seconds between checks of a brand's
+                profile file for changes, done on lookup (None disables reload)
+        """
+        self.profiles_dir = profiles_dir
+        self.memory_budget_bytes = memory_budget_bytes
+        self.reload_interval = reload_interval
+        self.shared = SharedArtifacts()
+        self._lock = threading.Lock()
+        # brand_id -> [engine, last reload check]
+        self._engines: "OrderedDict[str, List[Any]]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def brand_ids(self) -> List[str]:
+        """
+        List the brands that have a profile.
+
+        Returns:
+            Sorted brand ids
+        """
+        try:
+            names = os.listdir(self.profiles_dir)
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-5] for name in names if name.endswith(".json") and not name.startswith("."))
+
+    def _profile_path(self, brand_id: str) -> str:
+        """Path of a brand's profile; raises KeyError for unknown or unsafe ids."""
+        if not brand_id or brand_id.startswith(".") or os.sep in brand_id or (os.altsep and os.altsep in brand_id):
+            raise KeyError(brand_id)
+        path = os.path.join(self.profiles_dir, f"{brand_id}.json")
+        if not os.path.isfile(path):
+            raise KeyError(brand_id)
+        return path
+
+    def get(self, brand_id: str) -> PolicyEngine:
+        """
+        Return the policy engine for a brand, compiling it on first use.
+
+        Args:
+            brand_id: Brand id (profile file name without .json)
+
+        Returns:
+            PolicyEngine for the brand
+
+        Raises:
+            KeyError: If the brand has no profile
+            PolicyLoadError: If the profile, or a shared term list named in
+                its prohibited_lists, is missing or invalid
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._engines.get(brand_id)
+            if entry is not None:
+                self._engines.move_to_end(brand_id)
+                self.hits += 1
+                check_reload = self.reload_interval is not None and now - entry[1] >= self.reload_interval
+                if check_reload:
+                    entry[1] = now
+        if entry is not None:
+            if check_reload:
+                entry[0].reload()
+            return entry[0]
+
+        path = self._profile_path(brand_id)
+        try:
+            engine = PolicyEngine(path, shared=self.shared)
+        except (OSError, ValueError) as e:
+            # ValueError covers malformed JSON and invalid term lists
+            raise PolicyLoadError(f"Could not load brand policy '{brand_id}': {e}") from e
+        logger.info(f"🏷️ Compiled brand policy {brand_id} (version {engine.profile_version})")
+        with self._lock:
+            existing = self._engines.get(brand_id)
+            if existing is not None:
+                # Compiled concurrently by another session; keep the first
+                self.hits += 1
+                return existing[0]
+            self.misses += 1
+            self._engines[brand_id] = [engine, now]
+            self._evict()
+        return engine
+
+    def _memory_bytes(self) -> int:
+        """Approximate size of the compiled policies; shared lists and matchers are counted once."""
+        artifacts: Dict[int, Any] = {}
+        for entry in self._engines.values():
+            policy = entry[0].policy
+            artifacts[id(policy.matcher)] = policy.matcher
+            for term_list in policy.prohibited_lists:
+                artifacts[id(term_list)] = term_list
+        return sum(artifact.approx_bytes() for artifact in artifacts.values())
+
+    def _evict(self):
+        """Drop least recently used engines until under the memory budget (call with the lock held)."""
+        while len(self._engines) > 1 and self._memory_bytes() > self.memory_budget_bytes:
+            brand_id, _ = self._engines.popitem(last=False)
+            self.evictions += 1
+            logger.info(f"🧹 Evicted brand policy {brand_id} (memory budget {self.memory_budget_bytes // 1024} KB)")
+
+    def evict(self, brand_id: str):
+        """Drop a brand's compiled engine; it is compiled again on next use."""
+        with self._lock:
+            self._engines.pop(brand_id, None)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get registry metrics.
+
+        Returns:
+            Dictionary with compiled brands, memory use and budget, hit,
+            miss and eviction counts, and shared artifact counts
+        """
+        with self._lock:
+            return {
+                "compiled_brands": list(self._engines),
+                "memory_bytes": self._memory_bytes(),
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "shared": self.shared.get_metrics()
+            }
@@ -0,0 +1,259 @@
+"""
+Prompt Compiler Module
+Turns a governed JSON prompt into the exact strings sent to FIBO.
+
+compile_prompt() canonicalizes the prompt (sorted keys) once and memoizes
+everything derived from it: the payload sent to the model, its hash, the
+per-variant prompt strings and the human-readable summary. Variant
+flavors and seeds come from a VariantPlanner seeded by the prompt hash. Generation,
+cache keys and the audit trail all read from the same CompiledPrompt, so
+what is recorded is what was sent.
+"""
+
+import json
+import random
+import hashlib
+import functools
+from typing import Any, Dict, Optional, Union
+
+
+# Creative variations to add diversity; every variant gets one of each
+LIGHTING_FLAVORS = (
+    "golden sunset lighting", "dramatic shadows", "soft natural light",
+    "cinematic lighting", "warm ambient glow", "bright studio lighting"
+)
+
+ANGLE_FLAVORS = (
+    "close-up portrait", "wide-angle view", "low angle shot",
+    "bird's eye view", "three-quarter angle", "dynamic perspective"
+)
+
+MOOD_FLAVORS = (
+    "elegant atmosphere", "vibrant energy", "serene ambiance",
+    "dynamic composition", "minimalist aesthetic", "rich textures"
+)
+
+MAX_DISTINCT_VARIANTS = len(LIGHTING_FLAVORS) * len(ANGLE_FLAVORS) * len(MOOD_FLAVORS)
+
+
+class VariantPlanner:
+    """
+    Deterministic, non-repeating lighting x angle x mood plan for one prompt.
+
+    Variant n is mapped to a distinct flavor combination for the first
+    MAX_DISTINCT_VARIANTS variants. Consecutive variants change every
+    axis: the first six share no lighting, angle or mood, and the first
+    36 never repeat a lighting/angle pair. The order of each axis is
+    shuffled by the prompt hash, so different prompts explore different
+    combinations first while the same prompt always gets the same plan.
+    """
+
+    __slots__ = ("prompt_hash", "lighting", "angles", "moods")
+
+    def __init__(self, prompt_hash: str):
+        """
+        Initialize the plan.
+
+        Args:
+            prompt_hash: Hex hash of the canonical prompt (see CompiledPrompt)
+        """
+        self.prompt_hash = prompt_hash
+        rng = random.Random(int(prompt_hash[:16], 16))
+        self.lighting = rng.sample(LIGHTING_FLAVORS, len(LIGHTING_FLAVORS))
+        self.angles = rng.sample(ANGLE_FLAVORS, len(ANGLE_FLAVORS))
+        self.moods = rng.sample(MOOD_FLAVORS, len(MOOD_FLAVORS))
+
+    def flavor(self, variant_num: int) -> str:
+        """
+        Flavor phrase for a variant.
+
+        Args:
+            variant_num: Variant number (1-indexed); numbers past
+                MAX_DISTINCT_VARIANTS wrap around
+
+        Returns:
+            "lighting, angle, mood" phrase appended to the prompt
+        """
+        # Base-6 digits (s, r, q) of the index map one-to-one onto
+        # (lighting, angle, mood) = (s, s + r, s + 2r + q) mod 6
+        index = (variant_num - 1) % MAX_DISTINCT_VARIANTS
+        size = len(LIGHTING_FLAVORS)
+        s, r, q = index % size, (index // size) % size, index // (size * size)
+        return ", ".join((
+            self.lighting[s],
+            self.angles[(s + r) % size],
+            self.moods[(s + 2 * r + q) % size]
+        ))
+
+    def seed(self, variant_num: int) -> int:
+        """
+        Seed for a variant, stable for the prompt regardless of how many variants are requested.
+
+        Args:
+            variant_num: Variant number (1-indexed)
+
+        Returns:
+            Seed in [0, 9999999]
+        """
+        digest = hashlib.sha256(f"{self.prompt_hash}:{variant_num}".encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") % 10_000_000
+
+
+@functools.lru_cache(maxsize=1024)
+def get_variant_planner(prompt_hash: str) -> VariantPlanner:
+    """Return the (memoized) variant planner for a prompt hash."""
+    return VariantPlanner(prompt_hash)
+
+
+def generate_variant_prompt(base_prompt: str, variant_num: int, prompt_hash: Optional[str] = None) -> str:
+    """
+    Generate a slightly adjusted version of the prompt by adding creative flavor words.
+    
+    Args:
+        base_prompt: The original prompt text
+        variant_num: Variant number (1-indexed)
+        prompt_hash: Hash the variant plan is derived from (defaults to
+            the sha256 of base_prompt)
+        
+    Returns:
+        Modified prompt with added creative elements
+    """
+    if prompt_hash is None:
+        prompt_hash = hashlib.sha256(base_prompt.encode("utf-8")).hexdigest()
+    # Add the flavor to the end of the prompt
+    return f"{base_prompt}, {get_variant_planner(prompt_hash).flavor(variant_num)}"
+
+
+def build_prompt_from_governed_json(governed_json: Dict[str, Any]) -> str:
+    """
+    Convert JSON prompt structure to string format for FIBO API.
+    
+    Args:
+        governed_json: Structured JSON prompt
+        
+    Returns:
+        String representation of the prompt
+    """
+    if isinstance(governed_json, str):
+        try:
+            governed_json = json.loads(governed_json)
+        except Exception:
+            return governed_json
+
+    parts = []
+
+    scene = governed_json.get("scene")
+    if scene:
+        parts.append(str(scene))
+
+    style = governed_json.get("style")
+    if style:
+        parts.append(f"style: {style}")
+
+    modifiers = governed_json.get("modifiers") or governed_json.get("modifiers_list")
+    if isinstance(modifiers, list):
+        parts.append("modifiers: " + ", ".join(str(m) for m in modifiers))
+
+    mood = governed_json.get("mood")
+    if mood:
+        parts.append(f"mood: {mood}")
+
+    colors = governed_json.get("colors")
+    if isinstance(colors, list):
+        parts.append("colors: " + ", ".join(str(c) for c in colors))
+
+    if not parts:
+        return json.dumps(governed_json)
+
+    return " | ".join(parts)
+
+
+class CompiledPrompt:
+    """Canonical form of a governed JSON prompt and its variant strings."""
+
+    __slots__ = ("payload", "prompt_hash", "_display", "_variants")
+
+    def __init__(self, payload: str):
+        """
+        Initialize from a canonical payload.
+
+        Args:
+            payload: Canonical JSON string (see canonicalize_prompt)
+        """
+        self.payload = payload
+        self.prompt_hash = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        self._display = None
+        self._variants: Dict[int, str] = {}
+
+    @property
+    def display(self) -> str:
+        """Human-readable summary of the prompt (not sent to the model)."""
+        if self._display is None:
+            self._display = build_prompt_from_governed_json(self.payload)
+        return self._display
+
+    def variant_prompt(self, variant_num: int) -> str:
+        """
+        Exact prompt string sent to the model for a variant.
+
+        Args:
+            variant_num: Variant number (1-indexed)
+
+        Returns:
+            Canonical payload with the variant's creative flavor appended
+        """
+        prompt = self._variants.get(variant_num)
+        if prompt is None:
+            prompt = self._variants.setdefault(
+                variant_num, generate_variant_prompt(self.payload, variant_num, self.prompt_hash)
+            )
+        return prompt
+
+    @property
+    def planner(self) -> VariantPlanner:
+        """Variant plan (flavors and seeds) for this prompt."""
+        return get_variant_planner(self.prompt_hash)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, CompiledPrompt) and other.payload == self.payload
+
+    def __hash__(self) -> int:
+        return hash(self.payload)
+
+    def __repr__(self) -> str:
+        return f"<CompiledPrompt {self.prompt_hash[:12]}>"
+
+
+def canonicalize_prompt(json_prompt: Union[Dict[str, Any], str]) -> str:
+    """
+    Serialize a governed JSON prompt canonically (sorted keys, UTF-8 kept).
+
+    A string is parsed as JSON first; a string that is not JSON is used as is.
+    """
+    if isinstance(json_prompt, str):
+        try:
+            json_prompt = json.loads(json_prompt)
+        except ValueError:
+            return json_prompt
+    return json.dumps(json_prompt, ensure_ascii=False, sort_keys=True)
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_payload(payload: str) -> CompiledPrompt:
+    return CompiledPrompt(payload)
+
+
+def compile_prompt(json_prompt: Union[Dict[str, Any], str, CompiledPrompt]) -> CompiledPrompt:
+    """
+    Compile a governed JSON prompt, reusing earlier compilations of equal prompts.
+
+    Args:
+        json_prompt: Governed JSON prompt (dict or JSON string), or an
+            already compiled prompt
+
+    Returns:
+        Memoized CompiledPrompt
+    """
+    if isinstance(json_prompt, CompiledPrompt):
+        return json_prompt
+    return _compile_payload(canonicalize_prompt(json_prompt))
@@ -0,0 +1,90 @@
+"""
+Tests for the priority-aware waiter queue of AdaptiveConcurrencyLimiter.
+
+Run with: python -m unittest test_concurrency_limiter
+"""
+
+import time
+import asyncio
+import threading
+import unittest
+
+from fibo_client import AdaptiveConcurrencyLimiter
+
+
+def _single_slot_limiter() -> AdaptiveConcurrencyLimiter:
+    return AdaptiveConcurrencyLimiter(min_limit=1, max_limit=1, initial_limit=1)
+
+
+class AdaptiveConcurrencyLimiterPriorityTest(unittest.TestCase):
+
+    def _wait_queued(self, limiter: AdaptiveConcurrencyLimiter, count: int):
+        deadline = time.time() + 5
+        while limiter.get_metrics()["queued"] < count:
+            self.assertLess(time.time(), deadline, "waiters did not queue")
+            time.sleep(0.01)
+
+    def test_interactive_waiter_is_granted_before_earlier_batch_waiters(self):
+        limiter = _single_slot_limiter()
+        self.assertTrue(limiter.acquire())
+        granted = []
+
+        def waiter(name: str, priority: str):
+            if limiter.acquire(timeout=5, priority=priority):
+                granted.append(name)
+                limiter.release()
+
+        threads = []
+        for i, (name, priority) in enumerate([("batch-1", "batch"), ("batch-2", "batch"), ("interactive", "interactive")]):
+            thread = threading.Thread(target=waiter, args=(name, priority))
+            thread.start()
+            threads.append(thread)
+            self._wait_queued(limiter, i + 1)
+
+        self.assertEqual(limiter.get_metrics()["queued_by_priority"], {"interactive": 1, "batch": 2})
+        limiter.release()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        self.assertEqual(granted, ["interactive", "batch-1", "batch-2"])
+        self.assertEqual(limiter.get_metrics()["in_flight"], 0)
+
+    def test_async_waiters_are_granted_by_priority(self):
+        async def run():
+            limiter = _single_slot_limiter()
+            await limiter.acquire_async()
+            granted = []
+
+            async def waiter(name: str, priority: str):
+                await limiter.acquire_async(priority)
+                granted.append(name)
+                limiter.release()
+
+            tasks = [asyncio.ensure_future(waiter("batch", "batch"))]
+            await asyncio.sleep(0)
+            tasks.append(asyncio.ensure_future(waiter("interactive", "interactive")))
+            await asyncio.sleep(0)
+            self.assertEqual(limiter.get_metrics()["queued"], 2)
+
+            limiter.release()
+            await asyncio.wait_for(asyncio.gather(*tasks), timeout=5)
+            return granted
+
+        self.assertEqual(asyncio.run(run()), ["interactive", "batch"])
+
+    def test_timed_out_waiter_leaves_the_queue(self):
+        limiter = _single_slot_limiter()
+        self.assertTrue(limiter.acquire())
+        self.assertFalse(limiter.acquire(timeout=0.05, priority="batch"))
+        self.assertEqual(limiter.get_metrics()["queued"], 0)
+        limiter.release()
+        self.assertTrue(limiter.acquire(priority="batch"))
+
+    def test_unknown_priority_is_rejected(self):
+        limiter = _single_slot_limiter()
+        with self.assertRaises(ValueError):
+            limiter.acquire(priority="background")
+
+
+if __name__ == "__main__":
+    unittest.main()